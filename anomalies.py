@@ -0,0 +1,169 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Activity anomaly detection
+# Event streams are rolled up into hourly and daily counts. Each bucket is
+# scored against a seasonal baseline: the median of the same hour of the week
+# (or day of the week) over the previous few weeks, scaled by the median
+# absolute deviation. A detector only keeps that trailing window as state, so
+# buckets that arrive later are scored without refitting over the history.
+
+@dataclass(frozen=True)
+class Granularity:
+    name: str
+    step: pd.Timedelta
+    # Buckets per season and number of past seasons in the baseline
+    period: int
+    window: int
+    threshold: float
+
+GRANULARITIES = {
+    'daily': Granularity('daily', pd.Timedelta(days=1), 7, 8, 3.5),
+    'hourly': Granularity('hourly', pd.Timedelta(hours=1), 24 * 7, 6, 5.0),
+}
+
+# Past seasons required before a bucket is scored
+MIN_BASELINE_SEASONS = 4
+# An empty bucket is flagged as a stop when at least this many events were expected
+MIN_STOP_EXPECTED = 5
+
+# Event streams watched for anomalies: stream -> (store table, timestamp column)
+STREAMS = {
+    'notifications': ('notifications', 'created_at'),
+    'documents': ('documents', 'created_at'),
+}
+
+def rollup(timestamps, origin, step, buckets):
+    """Event counts per bucket of length step, starting at origin"""
+    offsets = (timestamps.to_numpy(dtype='datetime64[ns]') - origin.to_datetime64()) // step.to_timedelta64()
+    offsets = offsets[(offsets >= 0) & (offsets < buckets)]
+    return np.bincount(offsets, minlength=buckets)
+
+class StreamingDetector:
+    """Seasonal robust z-scores over the counts of one stream at one granularity"""
+    def __init__(self, granularity, origin):
+        self.granularity = granularity
+        self.origin = origin
+        # Buckets consumed so far and a running hash of their counts
+        self.watermark = 0
+        self.hasher = hashlib.blake2b(digest_size=16)
+        self.tail = np.zeros(0, dtype='float64')
+        self.flagged = []
+
+    def continues(self, origin, counts):
+        """True when counts extend what the detector has seen, i.e. no past bucket changed"""
+        if origin != self.origin or len(counts) < self.watermark:
+            return False
+        past = hashlib.blake2b(np.asarray(counts[:self.watermark], dtype='int64').tobytes(), digest_size=16)
+        return past.digest() == self.hasher.digest()
+
+    def extend(self, counts):
+        """Score new buckets in order against the trailing window and keep the flagged ones"""
+        g = self.granularity
+        if not len(counts):
+            return
+        self.hasher.update(np.asarray(counts, dtype='int64').tobytes())
+        counts = np.asarray(counts, dtype='float64')
+
+        history = np.concatenate([self.tail, counts])
+        positions = np.arange(len(self.tail), len(history))
+        lags = positions[:, None] - g.period * np.arange(1, g.window + 1)[None, :]
+        scored = (lags >= 0).sum(axis=1) >= MIN_BASELINE_SEASONS
+
+        if scored.any():
+            baseline = np.where(lags[scored] >= 0, history[np.maximum(lags[scored], 0)], np.nan)
+            expected = np.nanmedian(baseline, axis=1)
+            mad = np.nanmedian(np.abs(baseline - expected[:, None]), axis=1)
+            # Low-volume buckets have no spread; fall back to Poisson noise
+            scale = np.maximum(1.4826 * mad, np.sqrt(np.maximum(expected, 1)))
+            observed = counts[scored]
+            score = (observed - expected) / scale
+            stops = (observed == 0) & (expected >= MIN_STOP_EXPECTED)
+            hits = (np.abs(score) >= g.threshold) | stops
+            if hits.any():
+                kind = np.where(stops, 'stop', np.where(score > 0, 'spike', 'drop'))
+                self.flagged.append(pd.DataFrame({
+                    'bucket': self.watermark + np.flatnonzero(scored)[hits],
+                    'count': observed[hits].astype('int64'),
+                    'expected': expected[hits],
+                    'score': score[hits],
+                    'kind': kind[hits],
+                }))
+
+        self.watermark += len(counts)
+        self.tail = history[-g.period * g.window:]
+
+    def anomalies(self):
+        """Flagged buckets with their start and end times"""
+        if not self.flagged:
+            return pd.DataFrame(columns=['start', 'end', 'count', 'expected', 'score', 'kind'])
+        flagged = pd.concat(self.flagged, ignore_index=True)
+        start = self.origin + flagged.pop('bucket').to_numpy() * self.granularity.step
+        return flagged.assign(start=start, end=start + self.granularity.step)[['start', 'end', 'count', 'expected', 'score', 'kind']]
+
+def flagged_intervals(anomalies):
+    """Merge consecutive flagged buckets of the same kind into intervals"""
+    if anomalies.empty:
+        return pd.DataFrame(columns=['start', 'end', 'kind', 'count', 'expected', 'peak_score'])
+    breaks = (anomalies['start'] != anomalies['end'].shift()) | (anomalies['kind'] != anomalies['kind'].shift())
+    return anomalies.groupby(breaks.cumsum(), sort=False).agg(
+        start=('start', 'first'),
+        end=('end', 'last'),
+        kind=('kind', 'first'),
+        count=('count', 'sum'),
+        expected=('expected', 'sum'),
+        peak_score=('score', lambda score: score.iloc[np.abs(score.to_numpy()).argmax()]),
+    ).reset_index(drop=True)
+
+# One detector per stream and granularity, extended as new buckets close
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def detect(stream, timestamps, granularity, now=None):
+    """Flagged buckets of one stream, scoring only the buckets its detector has not seen.
+    The bucket containing now is still filling up and is left out."""
+    g = GRANULARITIES[granularity]
+    timestamps = pd.to_datetime(pd.Series(timestamps)).dropna()
+    if timestamps.empty:
+        return StreamingDetector(g, None).anomalies()
+
+    origin = timestamps.min().floor('D')
+    end = (pd.Timestamp.now() if now is None else pd.Timestamp(now)).floor(g.step)
+    counts = rollup(timestamps, origin, g.step, max((end - origin) // g.step, 0))
+
+    with _detectors_lock:
+        detector = _detectors.get((stream, granularity))
+        if detector is None or not detector.continues(origin, counts):
+            detector = StreamingDetector(g, origin)
+            _detectors[(stream, granularity)] = detector
+        detector.extend(counts[detector.watermark:])
+        return detector.anomalies()
+
+def stream_anomalies(stream, timestamps, now=None):
+    """Anomalous intervals of one stream at every granularity"""
+    intervals = [
+        flagged_intervals(detect(stream, timestamps, granularity, now)).assign(granularity=granularity)
+        for granularity in GRANULARITIES
+    ]
+    return pd.concat(intervals, ignore_index=True).sort_values('start', ignore_index=True)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_stream_anomalies(stream, version, hour, _timestamps):
+    """Anomalous intervals of one stream for one data version. Keyed by the current hour as
+    well, so a stream that stops changing is still checked as its buckets close."""
+    return stream_anomalies(stream, _timestamps, now=hour)
+
+def activity_anomalies(store, hour=None):
+    """Anomalous intervals of every watched stream in the store, with a stream column"""
+    hour = hour or store.activity_hour()
+    return pd.concat([
+        get_stream_anomalies(stream, store.versions[table], hour, getattr(store, table)[column]).assign(stream=stream)
+        for stream, (table, column) in STREAMS.items()
+        if not getattr(store, table).empty
+    ] or [pd.DataFrame(columns=['stream', 'start', 'end', 'kind', 'count', 'expected', 'peak_score', 'granularity'])],
+        ignore_index=True)
@@ -0,0 +1,96 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+# Timelines spanning more than this many days are bucketed per week, then per month
+DAILY_MAX_SPAN_DAYS = 366
+WEEKLY_MAX_SPAN_DAYS = 3 * 366
+
+TIMELINE_BUCKETS = {
+    'day': 'D',
+    'week': 'W-MON',
+    'month': 'MS',
+}
+
+# Figure cache
+@st.cache_resource(max_entries=512, show_spinner=False)
+def cached_figure(chart_id, data_version, filter_state, _build):
+    """Build a figure once per (chart, data version, filter state) and share it across reruns"""
+    return _build()
+
+def horizontal_bar(counts, title, x_label, y_label):
+    """Horizontal bar chart of a value_counts() result; empty counts give an empty chart"""
+    frame = pd.DataFrame({'label': counts.index.astype(str), 'count': counts.to_numpy()})
+    return px.bar(
+        frame,
+        x='count',
+        y='label',
+        orientation='h',
+        title=title,
+        labels={'count': x_label, 'label': y_label}
+    )
+
+# Timeline bucketing
+# Daily points up to a year, weekly up to three years, then monthly, so a line
+# chart carries a few hundred points at most for any span the DMS will reach.
+def timeline_bucket(start, end):
+    """Pick the bucket size for a timeline covering start..end"""
+    span_days = (end - start).days
+    if span_days <= DAILY_MAX_SPAN_DAYS:
+        return 'day'
+    if span_days <= WEEKLY_MAX_SPAN_DAYS:
+        return 'week'
+    return 'month'
+
+def timeline_counts(timestamps):
+    """Count events per day, week or month depending on the span"""
+    timestamps = pd.to_datetime(timestamps).dropna()
+    if timestamps.empty:
+        return pd.DataFrame({'created_date': pd.Series(dtype='datetime64[ns]'), 'count': pd.Series(dtype='int64')}), 'day'
+
+    bucket = timeline_bucket(timestamps.min(), timestamps.max())
+    counts = (
+        pd.Series(1, index=pd.DatetimeIndex(timestamps))
+        .resample(TIMELINE_BUCKETS[bucket], label='left', closed='left')
+        .sum()
+    )
+    return pd.DataFrame({'created_date': counts.index, 'count': counts.values}), bucket
+
+def timeline_figure(timestamps, title):
+    """Line chart of event counts over time with automatic bucketing"""
+    series, bucket = timeline_counts(timestamps)
+    if bucket != 'day':
+        title = f"{title} (per {bucket})"
+    return px.line(
+        series,
+        x='created_date',
+        y='count',
+        title=title,
+        labels={'created_date': bucket.capitalize(), 'count': 'Count'}
+    )
+
+# Anomaly highlighting
+ANOMALY_COLORS = {
+    'spike': '#d62728',
+    'drop': '#ff7f0e',
+    'stop': '#7f7f7f',
+}
+
+# Upper bound on the highlighted intervals per chart; the most severe are kept
+MAX_HIGHLIGHTS = 40
+
+def highlight_intervals(fig, intervals, start=None, end=None):
+    """Shade flagged intervals that overlap start..end on a timeline figure"""
+    if intervals.empty:
+        return fig
+    if start is not None:
+        intervals = intervals[intervals['end'] > pd.Timestamp(start)]
+    if end is not None:
+        intervals = intervals[intervals['start'] <= pd.Timestamp(end)]
+    intervals = intervals.loc[intervals['peak_score'].abs().sort_values(ascending=False).index[:MAX_HIGHLIGHTS]]
+    for interval in intervals.itertuples():
+        fig.add_vrect(
+            x0=interval.start, x1=interval.end,
+            fillcolor=ANOMALY_COLORS.get(interval.kind, '#7f7f7f'), opacity=0.2, line_width=0, layer='below'
+        )
+    return fig
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from creators import DAY_SPAN, to_days
+
+# Cohort retention
+# Users are grouped by registration month. A user counts as active in a month
+# when they created a document, or when a notification was raised about a
+# document they created. The distinct (user, month) activity pairs are built
+# once per data version as a sparse list of codes; a cohort table for any set
+# of users is then a bincount over the pairs of those users.
+
+ACTIVITY_SOURCES = {
+    'any': "Any activity",
+    'documents': "Documents created",
+    'notifications': "Notifications on their documents",
+}
+
+def month_index(timestamps):
+    """Months since January of year 0"""
+    values = pd.DatetimeIndex(pd.to_datetime(pd.Series(timestamps)))
+    return (values.year * 12 + values.month - 1).to_numpy()
+
+def match_creators(users_df, names, days):
+    """Position in users_df of the user behind each (creator name, day) event, -1 if none.
+    Namesakes are told apart by picking the latest one registered on or before the event."""
+    full_names = (users_df['firstname'].fillna('') + ' ' + users_df['lastname'].fillna('')).str.strip()
+    registered = users_df['created_at'].notna().to_numpy()
+    name_index = pd.Index(full_names[registered].unique())
+
+    user_positions = np.flatnonzero(registered)
+    user_keys = name_index.get_indexer(full_names[registered]) * DAY_SPAN + to_days(users_df['created_at'][registered])
+    order = np.argsort(user_keys, kind='stable')
+    user_keys, user_positions = user_keys[order], user_positions[order]
+
+    codes = name_index.get_indexer(pd.Series(names))
+    event_keys = codes * DAY_SPAN + days
+    found = np.searchsorted(user_keys, event_keys, side='right') - 1
+    matched = (codes >= 0) & (found >= 0)
+    matched[matched] = user_keys[found[matched]] // DAY_SPAN == codes[matched]
+    return np.where(matched, user_positions[np.maximum(found, 0)], -1)
+
+class CohortEngine:
+    """Monthly registration cohorts against activity in the months after registration"""
+    def __init__(self, users_df, documents_df, notifications_df):
+        self.users = len(users_df)
+        registered = users_df['created_at'].notna().to_numpy()
+        self.cohort_months = np.full(self.users, -1, dtype='int64')
+        self.cohort_months[registered] = month_index(users_df['created_at'][registered])
+        self.pairs = {}
+        self.unattributed = {}
+
+        months = [self.cohort_months[registered]]
+        events = {}
+        if not documents_df.empty:
+            created = documents_df['created_at'].notna().to_numpy()
+            documents = documents_df[created]
+            creators = match_creators(users_df, documents['created_by_name'], to_days(documents['created_at']))
+            events['documents'] = (creators, month_index(documents['created_at']))
+
+            if not notifications_df.empty:
+                # Notifications reach users through the documents they created
+                creator_by_doc = pd.Series(creators, index=documents['doc_id'].to_numpy())
+                creator_by_doc = creator_by_doc[~creator_by_doc.index.duplicated()]
+                notified = creator_by_doc.reindex(notifications_df['related_doc_id']).fillna(-1).to_numpy(dtype='int64')
+                dated = notifications_df['created_at'].notna().to_numpy()
+                events['notifications'] = (notified[dated], month_index(notifications_df['created_at'][dated]))
+
+        months += [event_months for _, event_months in events.values()]
+        self.first_month = int(min((m.min() for m in months if len(m)), default=0))
+        self.last_month = int(max((m.max() for m in months if len(m)), default=0))
+        self.span = self.last_month - self.first_month + 1
+
+        for source, (positions, event_months) in events.items():
+            attributed = positions >= 0
+            self.unattributed[source] = int((~attributed).sum())
+            # Activity before registration is not part of any cohort's retention
+            offsets = event_months[attributed] - self.cohort_months[positions[attributed]]
+            keep = offsets >= 0
+            self.pairs[source] = np.unique(positions[attributed][keep] * self.span + (event_months[attributed][keep] - self.first_month))
+        self.pairs['any'] = np.union1d(self.pairs.get('documents', []), self.pairs.get('notifications', [])).astype('int64')
+
+    def table(self, users=None, source='any', max_cohorts=None):
+        """Cohort sizes and active users per months-since-registration, for the users at the given
+        positions (all users by default). Months not yet reached by a cohort are NaN."""
+        user_mask = np.zeros(self.users, dtype=bool)
+        user_mask[np.arange(self.users) if users is None else users] = True
+        user_mask &= self.cohort_months >= 0
+
+        cohorts = self.cohort_months[user_mask] - self.first_month
+        sizes = np.bincount(cohorts, minlength=self.span)
+
+        pairs = self.pairs.get(source, np.zeros(0, dtype='int64'))
+        pair_users, pair_months = pairs // self.span, pairs % self.span
+        kept = user_mask[pair_users]
+        pair_cohorts = self.cohort_months[pair_users[kept]] - self.first_month
+        active = np.bincount(
+            pair_cohorts * self.span + (pair_months[kept] - pair_cohorts),
+            minlength=self.span * self.span
+        ).reshape(self.span, self.span).astype('float64')
+
+        # Offsets past the last month in the data have not happened yet
+        offsets = np.arange(self.span)
+        active[offsets[:, None] + offsets[None, :] >= self.span] = np.nan
+
+        present = np.flatnonzero(sizes)
+        if max_cohorts:
+            present = present[-max_cohorts:]
+        labels = [f"{(self.first_month + c) // 12}-{(self.first_month + c) % 12 + 1:02d}" for c in present]
+        width = self.span - present[0] if len(present) else 0
+        active_table = pd.DataFrame(active[present, :width], index=labels, columns=range(width))
+        active_table.index.name = 'cohort'
+        active_table.columns.name = 'months_since_registration'
+        return pd.Series(sizes[present], index=active_table.index, name='users'), active_table
+
+    def retention(self, users=None, source='any', max_cohorts=None):
+        """Share of each cohort active per months-since-registration"""
+        sizes, active = self.table(users, source, max_cohorts)
+        return active.div(sizes, axis=0)
+
+@st.cache_resource(max_entries=2, show_spinner="Building cohorts...")
+def get_cohort_engine(versions, _store):
+    """CohortEngine for one set of users, documents and notifications versions, shared by every session"""
+    return CohortEngine(_store.users, _store.documents, _store.notifications)
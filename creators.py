@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Creator activity
+# Each event is keyed as creator_code * DAY_SPAN + day and the keys are kept sorted,
+# so the per-creator count for any date window is two searchsorted calls for all
+# creators at once, and a top-k is an argpartition over those counts. Nothing is
+# rescanned or sorted per distinct creator when a leaderboard is requested.
+EPOCH = pd.Timestamp('1970-01-01')
+DAY_SPAN = 1 << 20
+
+def to_days(timestamps):
+    """Whole days since 1970-01-01"""
+    values = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[D]')
+    return values.astype('int64')
+
+class CreatorActivity:
+    """Per-creator event counts over time for leaderboards, trends and drill-down"""
+    def __init__(self, created_by, created_at):
+        created_by = pd.Series(created_by).reset_index(drop=True)
+        created_at = pd.Series(created_at).reset_index(drop=True)
+        self.creators = pd.Index(created_by.dropna().unique())
+        # Creator code of every row the index was built from, -1 for rows without a creator
+        self.row_codes = self.creators.get_indexer(created_by)
+
+        valid = (self.row_codes >= 0) & created_at.notna().to_numpy()
+        self.keys = np.sort(self.row_codes[valid] * DAY_SPAN + to_days(created_at[valid]))
+
+    def window_counts(self, start=None, end=None):
+        """Events per creator with start <= date <= end (dates inclusive, None meaning unbounded)"""
+        codes = np.arange(len(self.creators), dtype='int64') * DAY_SPAN
+        first = 0 if start is None else int(to_days([start])[0])
+        last = DAY_SPAN - 1 if end is None else int(to_days([end])[0])
+        low = np.searchsorted(self.keys, codes + first, side='left')
+        high = np.searchsorted(self.keys, codes + last, side='right')
+        return high - low
+
+    def row_counts(self, rows):
+        """Events per creator among the given row positions, e.g. the rows left by a filter"""
+        codes = self.row_codes[rows]
+        return np.bincount(codes[codes >= 0], minlength=len(self.creators))
+
+    def top_k(self, counts, k=10):
+        """Creator codes of the k largest counts, largest first"""
+        nonzero = np.flatnonzero(counts)
+        if len(nonzero) > k:
+            nonzero = nonzero[np.argpartition(counts[nonzero], -k)[-k:]]
+        return nonzero[np.lexsort((nonzero, -counts[nonzero]))]
+
+    def leaderboard(self, start=None, end=None, k=10, rows=None):
+        """Top-k creators with their counts and the change against the previous window of equal length"""
+        counts = self.window_counts(start, end) if rows is None else self.row_counts(rows)
+        top = self.top_k(counts, k)
+        board = pd.DataFrame({'creator': self.creators[top], 'count': counts[top]})
+
+        if start is not None and end is not None:
+            length = pd.Timestamp(end) - pd.Timestamp(start) + pd.Timedelta(days=1)
+            previous = self.window_counts(pd.Timestamp(start) - length, pd.Timestamp(start) - pd.Timedelta(days=1))
+            board['previous'] = previous[top]
+            board['change'] = board['count'] - board['previous']
+        return board
+
+    def creator_timeline(self, creator, freq='MS', start=None, end=None):
+        """Event counts of one creator per period"""
+        code = self.creators.get_loc(creator)
+        low, high = np.searchsorted(self.keys, [code * DAY_SPAN, (code + 1) * DAY_SPAN])
+        days = self.keys[low:high] - code * DAY_SPAN
+        dates = pd.DatetimeIndex(EPOCH + pd.to_timedelta(days, unit='D'))
+        if start is not None:
+            dates = dates[dates >= pd.Timestamp(start)]
+        if end is not None:
+            dates = dates[dates < pd.Timestamp(end) + pd.Timedelta(days=1)]
+        counts = pd.Series(1, index=dates).resample(freq).sum() if len(dates) else pd.Series(dtype='int64')
+        return pd.DataFrame({'date': counts.index, 'count': counts.to_numpy()})
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_creator_activity(table, version, _df):
+    """CreatorActivity for one table at one data version, shared by every session"""
+    return CreatorActivity(_df['created_by_name'], _df['created_at'])
+
+def view_leaderboard(activity, df, filtered_df, date_range, date_only, k=10):
+    """Leaderboard for a dashboard view: window counts when only the date range is
+    filtered, otherwise counts over the rows the filters kept"""
+    if date_only:
+        start, end = date_range if date_range and len(date_range) == 2 else (None, None)
+        return activity.leaderboard(start, end, k=k)
+    return activity.leaderboard(rows=df.index.get_indexer(filtered_df.index), k=k)
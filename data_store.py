@@ -0,0 +1,298 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import Error
+import pandas as pd
+import streamlit as st
+
+from snapshot import read_manifest, read_snapshot, write_snapshot
+
+# Filtered frames must never write through to the shared store. Copy-on-Write
+# is the default from pandas 3.0; opt in explicitly on pandas 2.x.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Database connection function
+def create_connection():
+    try:
+        connection = mysql.connector.connect(
+            host='127.0.0.1',
+            database='ispsc_tagudin_dms_db',
+            user='root',  # Replace with your MySQL username
+            password=''   # Replace with your MySQL password
+        )
+        return connection
+    except Error as e:
+        st.error(f"Error connecting to MySQL database: {e}")
+        return None
+
+# Loader queries, kept at module level so diagnostics can inspect what the app issues
+DOCUMENTS_QUERY = """
+    SELECT d.doc_id, d.title, d.reference, d.status, d.visible_to_all,
+           d.created_at, d.updated_at, d.created_by_name, d.deleted,
+           dt.name as doc_type, GROUP_CONCAT(dept.name) as departments
+    FROM dms_documents d
+    LEFT JOIN document_types dt ON d.doc_type = dt.type_id
+    LEFT JOIN document_departments dd ON d.doc_id = dd.doc_id
+    LEFT JOIN departments dept ON dd.department_id = dept.department_id
+    GROUP BY d.doc_id
+"""
+
+USERS_QUERY = """
+    SELECT u.user_id, u.Username, u.firstname, u.lastname, u.user_email,
+           u.role, u.status, u.created_at, u.updated_at,
+           d.name as department
+    FROM dms_user u
+    LEFT JOIN departments d ON u.department_id = d.department_id
+"""
+
+ANNOUNCEMENTS_QUERY = """
+    SELECT announcement_id, title, status, visible_to_all,
+           publish_at, expire_at, created_by_name, created_at
+    FROM announcements
+"""
+
+NOTIFICATIONS_QUERY = """
+    SELECT notification_id, title, type, created_at, related_doc_id
+    FROM notifications
+"""
+
+DOCUMENT_DEPARTMENTS_QUERY = """
+    SELECT dd.doc_id, dd.department_id, dept.name as department
+    FROM document_departments dd
+    JOIN departments dept ON dd.department_id = dept.department_id
+"""
+
+DOCUMENT_TYPES_QUERY = "SELECT type_id, name FROM document_types ORDER BY name"
+
+# Date columns converted once at load time, per table
+DATE_COLUMNS = {
+    'documents': ['created_at', 'updated_at'],
+    'users': ['created_at', 'updated_at'],
+    'announcements': ['created_at', 'publish_at', 'expire_at'],
+    'notifications': ['created_at'],
+    'document_types': [],
+    'document_departments': [],
+}
+
+def prepare_frame(df, date_columns):
+    """Convert date columns once, before the frame is shared"""
+    if not df.empty:
+        for column in date_columns:
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+# Change tracking
+# sql/change_log.sql installs triggers that bump a per-table counter in
+# dms_data_version on every write. Dashboard tables are reloaded only when the
+# version of one of their source tables moves.
+CHANGE_POLL_SECONDS = 5
+
+SOURCE_TABLES = {
+    'documents': ['dms_documents', 'document_types', 'document_departments', 'departments'],
+    'users': ['dms_user', 'departments'],
+    'announcements': ['announcements'],
+    'notifications': ['notifications'],
+    'document_types': ['document_types'],
+    'document_departments': ['document_departments', 'departments'],
+}
+
+LOADER_QUERIES = {
+    'documents': DOCUMENTS_QUERY,
+    'users': USERS_QUERY,
+    'announcements': ANNOUNCEMENTS_QUERY,
+    'notifications': NOTIFICATIONS_QUERY,
+    'document_types': DOCUMENT_TYPES_QUERY,
+    'document_departments': DOCUMENT_DEPARTMENTS_QUERY,
+}
+
+VERSION_QUERY = "SELECT table_name, version FROM dms_data_version"
+
+# Fallback when the change-log table is not installed: cheap per-table fingerprints
+FINGERPRINT_QUERY = """
+SELECT 'dms_documents', CONCAT(COUNT(*), '/', COALESCE(MAX(updated_at), '')) FROM dms_documents
+UNION ALL SELECT 'document_types', CONCAT(COUNT(*), '/', COALESCE(MAX(type_id), '')) FROM document_types
+UNION ALL SELECT 'document_departments', CONCAT(COUNT(*), '/', COALESCE(SUM(doc_id * 31 + department_id), '')) FROM document_departments
+UNION ALL SELECT 'departments', CONCAT(COUNT(*), '/', COALESCE(MAX(department_id), '')) FROM departments
+UNION ALL SELECT 'dms_user', CONCAT(COUNT(*), '/', COALESCE(MAX(updated_at), '')) FROM dms_user
+UNION ALL SELECT 'announcements', CONCAT(COUNT(*), '/', COALESCE(MAX(created_at), '')) FROM announcements
+UNION ALL SELECT 'notifications', CONCAT(COUNT(*), '/', COALESCE(MAX(notification_id), '')) FROM notifications
+"""
+
+def read_source_versions():
+    """Current version of every source table, or None when the database is unreachable"""
+    conn = create_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(VERSION_QUERY)
+        except Error:
+            cursor.execute(FINGERPRINT_QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+    except Error as e:
+        st.error(f"Error reading data versions: {e}")
+        return None
+    finally:
+        conn.close()
+    return {str(name): str(version) for name, version in rows}
+
+# Offline mode
+# DMS_SNAPSHOT replays a snapshot file instead of querying MySQL; DMS_FALLBACK_SNAPSHOT
+# is served while MySQL is unreachable. A store loaded from a snapshot carries the
+# file under SNAPSHOT_KEY in its versions, so replacing the file reloads the store.
+SNAPSHOT_ENV = 'DMS_SNAPSHOT'
+FALLBACK_SNAPSHOT_ENV = 'DMS_FALLBACK_SNAPSHOT'
+SNAPSHOT_KEY = 'snapshot'
+
+def snapshot_versions(path):
+    """Table versions recorded in a snapshot, plus the snapshot file and its modification time"""
+    manifest = read_manifest(path)
+    tables = manifest['tables']
+    versions = {name: str(tables[name]['version']) if name in tables else 'missing' for name in LOADER_QUERIES}
+    versions[SNAPSHOT_KEY] = f"{os.path.abspath(path)}@{os.path.getmtime(path)}"
+    return versions
+
+# Last versions read successfully, kept so a transient connection error does not empty the store
+_last_known_versions = {}
+
+@st.cache_data(ttl=CHANGE_POLL_SECONDS, show_spinner=False)
+def get_table_versions():
+    """Version of each dashboard table; polled at most once per CHANGE_POLL_SECONDS per process"""
+    if os.environ.get(SNAPSHOT_ENV):
+        return snapshot_versions(os.environ[SNAPSHOT_ENV])
+    source_versions = read_source_versions()
+    if source_versions is None:
+        if _last_known_versions:
+            return dict(_last_known_versions)
+        fallback = os.environ.get(FALLBACK_SNAPSHOT_ENV)
+        if fallback and os.path.exists(fallback):
+            return snapshot_versions(fallback)
+        return {name: 'unavailable' for name in SOURCE_TABLES}
+    versions = {
+        name: '|'.join(f"{source}:{source_versions.get(source, '0')}" for source in sources)
+        for name, sources in SOURCE_TABLES.items()
+    }
+    _last_known_versions.update(versions)
+    return versions
+
+class DataUnavailable(Exception):
+    """A table could not be loaded; raised so that nothing is cached under its version"""
+
+@st.cache_resource(max_entries=len(LOADER_QUERIES) * 2, show_spinner="Loading data...")
+def get_table(name, version):
+    """Load and prepare one dashboard table; cached until its version changes"""
+    conn = create_connection()
+    if not conn:
+        raise DataUnavailable(f"No database connection while loading {name}")
+    try:
+        df = pd.read_sql(LOADER_QUERIES[name], conn)
+    except Error as e:
+        raise DataUnavailable(f"Error loading {name}: {e}") from e
+    finally:
+        conn.close()
+    return prepare_frame(df, DATE_COLUMNS[name])
+
+def compute_data_version(table_versions):
+    """Combined data version of the store"""
+    return hashlib.md5(repr(sorted(table_versions.items())).encode()).hexdigest()
+
+@dataclass(frozen=True)
+class DataStore:
+    """Immutable set of dashboard tables shared by every session of the process"""
+    documents: pd.DataFrame
+    users: pd.DataFrame
+    announcements: pd.DataFrame
+    notifications: pd.DataFrame
+    document_types: pd.DataFrame
+    document_departments: pd.DataFrame
+    version: str
+    versions: dict
+    loaded_at: datetime
+
+    def memory_usage(self):
+        """Deep memory usage of the shared frames in bytes"""
+        frames = (self.documents, self.users, self.announcements, self.notifications, self.document_types, self.document_departments)
+        return int(sum(df.memory_usage(deep=True).sum() for df in frames))
+
+    def activity_hour(self):
+        """Hour activity is scored up to: the time a snapshot was taken when replaying one,
+        since every bucket after it would look empty, otherwise the current hour"""
+        return pd.Timestamp(self.loaded_at if SNAPSHOT_KEY in self.versions else datetime.now()).floor('h')
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def build_data_store(version_items):
+    """Assemble a DataStore from the per-table caches for one set of table versions"""
+    versions = dict(version_items)
+    frames = {name: get_table(name, versions[name]) for name in LOADER_QUERIES}
+    return DataStore(
+        version=compute_data_version(versions),
+        versions=versions,
+        loaded_at=datetime.now(),
+        **frames
+    )
+
+def load_snapshot_store(path):
+    """DataStore read from a snapshot file; tables missing from the snapshot are empty"""
+    frames, manifest = read_snapshot(path)
+    return DataStore(
+        version=manifest['data_version'],
+        versions=snapshot_versions(path),
+        loaded_at=datetime.fromisoformat(manifest['created_at']),
+        **{name: frames.get(name, pd.DataFrame()) for name in LOADER_QUERIES}
+    )
+
+@st.cache_resource(max_entries=2, show_spinner="Loading snapshot...")
+def get_snapshot_store(snapshot):
+    """DataStore for one snapshot file version (path@mtime)"""
+    return load_snapshot_store(snapshot.rsplit('@', 1)[0])
+
+def export_snapshot(store, path):
+    """Write the store's tables with their schema and versions to a snapshot file"""
+    if any(store.versions.get(name) == 'unavailable' for name in LOADER_QUERIES):
+        raise ValueError("Database unavailable; nothing to snapshot")
+    return write_snapshot(
+        path,
+        {name: getattr(store, name) for name in LOADER_QUERIES},
+        {name: store.versions[name] for name in LOADER_QUERIES},
+        store.version,
+        store.loaded_at,
+        source=store.versions.get(SNAPSHOT_KEY, 'mysql')
+    )
+
+def unavailable_store():
+    """Empty store whose versions never match the database, so sessions keep retrying"""
+    versions = {name: 'unavailable' for name in LOADER_QUERIES}
+    return DataStore(
+        version=compute_data_version(versions),
+        versions=versions,
+        loaded_at=datetime.now(),
+        **{name: pd.DataFrame() for name in LOADER_QUERIES}
+    )
+
+# Last store built successfully, served while a reload fails
+_last_store = None
+
+def get_data_store():
+    """Process-wide DataStore for the current data version; sessions share it instead of holding copies.
+    When a table cannot be loaded the previous store is kept and the load is retried on the next poll."""
+    global _last_store
+    versions = get_table_versions()
+    if SNAPSHOT_KEY in versions:
+        return get_snapshot_store(versions[SNAPSHOT_KEY])
+    try:
+        _last_store = build_data_store(tuple(sorted(versions.items())))
+    except DataUnavailable as e:
+        if _last_store is not None:
+            return _last_store
+        fallback = os.environ.get(FALLBACK_SNAPSHOT_ENV)
+        if fallback and os.path.exists(fallback):
+            return get_snapshot_store(snapshot_versions(fallback)[SNAPSHOT_KEY])
+        st.error(f"Data unavailable: {e}")
+        return unavailable_store()
+    return _last_store
@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import mysql.connector
-from mysql.connector import Error
-from fpdf import FPDF
 import base64
 from io import BytesIO
+from charts import cached_figure, highlight_intervals, horizontal_bar, timeline_figure
+from anomalies import activity_anomalies
+from lifecycle import announcement_windows, document_backlog, document_lifecycle_summary, time_to_update_histogram
+from report import create_pdf_report
+from report_bundle import build_report_bundle
+from creators import get_creator_activity, view_leaderboard
+from cohorts import ACTIVITY_SOURCES, get_cohort_engine
+from data_store import CHANGE_POLL_SECONDS, SNAPSHOT_KEY, get_data_store, get_table_versions
+from visibility import department_scope, get_visibility_index
 
 # Page configuration
 st.set_page_config(
@@ -78,326 +85,124 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database connection function
-def create_connection():
-    try:
-        connection = mysql.connector.connect(
-            host='127.0.0.1',
-            database='ispsc_tagudin_dms_db',
-            user='root',  # Replace with your MySQL username
-            password=''   # Replace with your MySQL password
-        )
-        return connection
-    except Error as e:
-        st.error(f"Error connecting to MySQL database: {e}")
+# Filter functions
+# Filters combine boolean masks over the shared frames and return only the selected
+# rows; with no active filter the shared frame itself is returned, never a copy.
+# visible_mask is the session's department scope (see visibility.py).
+def combine_masks(mask, condition):
+    return condition if mask is None else mask & condition
+
+def date_range_mask(dates, date_range):
+    """Mask of rows whose date falls inside the inclusive (start, end) date range"""
+    if not date_range or len(date_range) != 2:
+        return None
+    start_date, end_date = date_range
+    if not (start_date and end_date):
         return None
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    return (dates >= start) & (dates < end)
 
-# Load data functions
-def load_documents_data():
-    conn = create_connection()
-    if conn:
-        query = """
-        SELECT d.doc_id, d.title, d.reference, d.status, d.visible_to_all, 
-               d.created_at, d.updated_at, d.created_by_name, d.deleted,
-               dt.name as doc_type, GROUP_CONCAT(dept.name) as departments
-        FROM dms_documents d
-        LEFT JOIN document_types dt ON d.doc_type = dt.type_id
-        LEFT JOIN document_departments dd ON d.doc_id = dd.doc_id
-        LEFT JOIN departments dept ON dd.department_id = dept.department_id
-        GROUP BY d.doc_id
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    return pd.DataFrame()
-
-def load_users_data():
-    conn = create_connection()
-    if conn:
-        query = """
-        SELECT u.user_id, u.Username, u.firstname, u.lastname, u.user_email, 
-               u.role, u.status, u.created_at, u.updated_at,
-               d.name as department
-        FROM dms_user u
-        LEFT JOIN departments d ON u.department_id = d.department_id
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    return pd.DataFrame()
-
-def load_announcements_data():
-    conn = create_connection()
-    if conn:
-        query = """
-        SELECT announcement_id, title, status, visible_to_all, 
-               publish_at, expire_at, created_by_name, created_at
-        FROM announcements
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    return pd.DataFrame()
-
-def load_notifications_data():
-    conn = create_connection()
-    if conn:
-        query = """
-        SELECT notification_id, title, type, created_at, related_doc_id
-        FROM notifications
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    return pd.DataFrame()
-
-def load_document_types_data():
-    conn = create_connection()
-    if conn:
-        query = "SELECT type_id, name FROM document_types ORDER BY name"
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    return pd.DataFrame()
+def apply_mask(df, mask):
+    return df if mask is None else df[mask]
 
-# Filter functions
-def filter_documents(documents_df, status_filter, type_filter, date_range, creator_filter):
+def count_visible(df, visible_mask, condition=None):
+    """Number of rows in the session's scope, optionally also matching condition"""
+    mask = visible_mask if condition is None else combine_masks(visible_mask, condition)
+    return len(df) if mask is None else int(np.count_nonzero(mask))
+
+def filter_documents(documents_df, status_filter, type_filter, date_range, creator_filter, visible_mask=None):
     """Filter documents based on selected criteria"""
-    filtered_df = documents_df.copy()
+    mask = visible_mask
     
     if status_filter and status_filter != "All":
-        filtered_df = filtered_df[filtered_df['status'] == status_filter]
+        mask = combine_masks(mask, documents_df['status'] == status_filter)
     
     if type_filter and type_filter != "All":
-        filtered_df = filtered_df[filtered_df['doc_type'] == type_filter]
+        mask = combine_masks(mask, documents_df['doc_type'] == type_filter)
     
-    if date_range:
-        start_date, end_date = date_range
-        if start_date and end_date:
-            filtered_df = filtered_df[
-                (filtered_df['created_at'].dt.date >= start_date) &
-                (filtered_df['created_at'].dt.date <= end_date)
-            ]
+    date_mask = date_range_mask(documents_df['created_at'], date_range)
+    if date_mask is not None:
+        mask = combine_masks(mask, date_mask)
     
     if creator_filter and creator_filter != "All":
-        filtered_df = filtered_df[filtered_df['created_by_name'] == creator_filter]
+        mask = combine_masks(mask, documents_df['created_by_name'] == creator_filter)
     
-    return filtered_df
+    return apply_mask(documents_df, mask)
 
-def filter_users(users_df, status_filter, role_filter, department_filter, date_range):
+def filter_users(users_df, status_filter, role_filter, department_filter, date_range, visible_mask=None):
     """Filter users based on selected criteria"""
-    filtered_df = users_df.copy()
+    mask = visible_mask
     
     if status_filter and status_filter != "All":
-        filtered_df = filtered_df[filtered_df['status'] == status_filter]
+        mask = combine_masks(mask, users_df['status'] == status_filter)
     
     if role_filter and role_filter != "All":
-        filtered_df = filtered_df[filtered_df['role'] == role_filter]
+        mask = combine_masks(mask, users_df['role'] == role_filter)
     
     if department_filter and department_filter != "All":
-        filtered_df = filtered_df[filtered_df['department'] == department_filter]
+        mask = combine_masks(mask, users_df['department'] == department_filter)
     
-    if date_range:
-        start_date, end_date = date_range
-        if start_date and end_date:
-            filtered_df = filtered_df[
-                (filtered_df['created_at'].dt.date >= start_date) &
-                (filtered_df['created_at'].dt.date <= end_date)
-            ]
+    date_mask = date_range_mask(users_df['created_at'], date_range)
+    if date_mask is not None:
+        mask = combine_masks(mask, date_mask)
     
-    return filtered_df
+    return apply_mask(users_df, mask)
 
-def filter_announcements(announcements_df, status_filter, visibility_filter, date_range, creator_filter):
+def filter_announcements(announcements_df, status_filter, visibility_filter, date_range, creator_filter, visible_mask=None):
     """Filter announcements based on selected criteria"""
-    filtered_df = announcements_df.copy()
+    mask = visible_mask
     
     if status_filter and status_filter != "All":
-        filtered_df = filtered_df[filtered_df['status'] == status_filter]
+        mask = combine_masks(mask, announcements_df['status'] == status_filter)
     
     if visibility_filter and visibility_filter != "All":
         if visibility_filter == "Visible to All":
-            filtered_df = filtered_df[filtered_df['visible_to_all'] == 1]
+            mask = combine_masks(mask, announcements_df['visible_to_all'] == 1)
         else:
-            filtered_df = filtered_df[filtered_df['visible_to_all'] == 0]
+            mask = combine_masks(mask, announcements_df['visible_to_all'] == 0)
     
-    if date_range:
-        start_date, end_date = date_range
-        if start_date and end_date:
-            filtered_df = filtered_df[
-                (filtered_df['created_at'].dt.date >= start_date) &
-                (filtered_df['created_at'].dt.date <= end_date)
-            ]
+    date_mask = date_range_mask(announcements_df['created_at'], date_range)
+    if date_mask is not None:
+        mask = combine_masks(mask, date_mask)
     
     if creator_filter and creator_filter != "All":
-        filtered_df = filtered_df[filtered_df['created_by_name'] == creator_filter]
+        mask = combine_masks(mask, announcements_df['created_by_name'] == creator_filter)
     
-    return filtered_df
+    return apply_mask(announcements_df, mask)
 
-def filter_notifications(notifications_df, type_filter, date_range):
+def filter_notifications(notifications_df, type_filter, date_range, visible_mask=None):
     """Filter notifications based on selected criteria"""
-    filtered_df = notifications_df.copy()
+    mask = visible_mask
     
     if type_filter and type_filter != "All":
-        filtered_df = filtered_df[filtered_df['type'] == type_filter]
-    
-    if date_range:
-        start_date, end_date = date_range
-        if start_date and end_date:
-            filtered_df = filtered_df[
-                (filtered_df['created_at'].dt.date >= start_date) &
-                (filtered_df['created_at'].dt.date <= end_date)
-            ]
-    
-    return filtered_df
-
-# PDF Generation Functions
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'ISPSC Tagudin DMS Analytics Report', 0, 1, 'C')
-        self.ln(5)
-    
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-    
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(2)
-    
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 10)
-        self.multi_cell(0, 8, body)
-        self.ln()
-
-def create_pdf_report(documents_df, users_df, announcements_df, notifications_df):
-    pdf = PDFReport()
-    pdf.add_page()
-    
-    # Report header
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'ISPSC Tagudin DMS Analytics Report', 0, 1, 'C')
-    pdf.ln(5)
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 10, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 0, 1, 'C')
-    pdf.ln(10)
-    
-    # Key Metrics
-    pdf.chapter_title('Key Metrics')
-    
-    total_docs = len(documents_df) if not documents_df.empty else 0
-    active_users = len(users_df[users_df['status'] == 'active']) if not users_df.empty else 0
-    published_announcements = len(announcements_df[announcements_df['status'] == 'published']) if not announcements_df.empty else 0
-    recent_notifications = len(notifications_df[notifications_df['created_at'] > (datetime.now() - timedelta(days=7))]) if not notifications_df.empty else 0
-    
-    metrics_data = [
-        ['Metric', 'Value'],
-        ['Total Documents', str(total_docs)],
-        ['Active Users', str(active_users)],
-        ['Published Announcements', str(published_announcements)],
-        ['Recent Notifications (7 days)', str(recent_notifications)]
-    ]
-    
-    # Create metrics table
-    col_width = pdf.w / 2.5
-    row_height = pdf.font_size * 2
-    
-    for row in metrics_data:
-        for item in row:
-            pdf.cell(col_width, row_height, item, border=1)
-        pdf.ln(row_height)
-    
-    pdf.ln(10)
-    
-    # Document Analytics
-    pdf.chapter_title('Document Analytics')
-    
-    if not documents_df.empty:
-        # Document status distribution
-        status_counts = documents_df['status'].value_counts()
-        status_text = "Document Status Distribution:\n"
-        for status, count in status_counts.items():
-            status_text += f"- {status}: {count} documents\n"
-        
-        # Document type distribution
-        if 'doc_type' in documents_df.columns:
-            type_counts = documents_df['doc_type'].value_counts()
-            type_text = "\nDocument Types Distribution:\n"
-            for doc_type, count in type_counts.items():
-                type_text += f"- {doc_type}: {count} documents\n"
-        else:
-            type_text = ""
-        
-        pdf.chapter_body(status_text + type_text)
-    else:
-        pdf.chapter_body("No document data available.")
-    
-    pdf.ln(5)
-    
-    # User Analytics
-    pdf.chapter_title('User Analytics')
-    
-    if not users_df.empty:
-        # User status distribution
-        status_counts = users_df['status'].value_counts()
-        status_text = "User Status Distribution:\n"
-        for status, count in status_counts.items():
-            status_text += f"- {status}: {count} users\n"
-        
-        # User role distribution
-        role_counts = users_df['role'].value_counts()
-        role_text = "\nUser Role Distribution:\n"
-        for role, count in role_counts.items():
-            role_text += f"- {role}: {count} users\n"
-        
-        pdf.chapter_body(status_text + role_text)
-    else:
-        pdf.chapter_body("No user data available.")
-    
-    pdf.ln(5)
-    
-    # Announcement Analytics
-    pdf.chapter_title('Announcement Analytics')
-    
-    if not announcements_df.empty:
-        # Announcement status distribution
-        status_counts = announcements_df['status'].value_counts()
-        status_text = "Announcement Status Distribution:\n"
-        for status, count in status_counts.items():
-            status_text += f"- {status}: {count} announcements\n"
-        
-        # Visibility distribution
-        visibility_counts = announcements_df['visible_to_all'].value_counts()
-        visibility_text = "\nAnnouncement Visibility:\n"
-        for visibility, count in visibility_counts.items():
-            vis_name = "Visible to All" if visibility == 1 else "Restricted"
-            visibility_text += f"- {vis_name}: {count} announcements\n"
-        
-        pdf.chapter_body(status_text + visibility_text)
-    else:
-        pdf.chapter_body("No announcement data available.")
-    
-    pdf.ln(5)
-    
-    # System Activity
-    pdf.chapter_title('System Activity')
-    
-    if not notifications_df.empty:
-        # Notification type distribution
-        type_counts = notifications_df['type'].value_counts()
-        type_text = "Notification Types Distribution:\n"
-        for n_type, count in type_counts.items():
-            type_text += f"- {n_type}: {count} notifications\n"
-        
-        pdf.chapter_body(type_text)
-    else:
-        pdf.chapter_body("No notification data available.")
-    
-    # Save PDF to bytes buffer
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    return pdf_bytes
+        mask = combine_masks(mask, notifications_df['type'] == type_filter)
+    
+    date_mask = date_range_mask(notifications_df['created_at'], date_range)
+    if date_mask is not None:
+        mask = combine_masks(mask, date_mask)
+    
+    return apply_mask(notifications_df, mask)
+
+def show_creator_drilldown(activity, df, filtered_df, date_range, date_only, table):
+    """Leaderboard with trend against the previous period, and one creator's activity over time"""
+    with st.expander("👤 Creator Activity"):
+        board = view_leaderboard(activity, df, filtered_df, date_range, date_only, k=25)
+        if board.empty:
+            st.info("No creator activity in this view.")
+            return
+        if 'change' not in board.columns:
+            st.caption("Trend against the previous period is available when only the date range is filtered.")
+        st.dataframe(board, hide_index=True)
+        
+        creator = st.selectbox("Creator", list(board['creator']), key=f"{table}_creator_drilldown")
+        start, end = date_range if date_range and len(date_range) == 2 else (None, None)
+        creator_timeline = activity.creator_timeline(creator, start=start, end=end)
+        st.plotly_chart(
+            px.bar(creator_timeline, x='date', y='count', title=f"{creator}: {table.capitalize()} per Month",
+                   labels={'date': 'Month', 'count': table.capitalize()}),
+            use_container_width=True
+        )
 
 def get_table_download_link(df, filename, link_text):
     """Generates a link to download the data as a CSV file"""
@@ -406,32 +211,62 @@ def get_table_download_link(df, filename, link_text):
     href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{link_text}</a>'
     return href
 
-# Load all data
-documents_df = load_documents_data()
-users_df = load_users_data()
-announcements_df = load_announcements_data()
-notifications_df = load_notifications_data()
-doc_types_df = load_document_types_data()
+# Load all data (shared, read-only store; never modify these frames in place)
+store = get_data_store()
+documents_df = store.documents
+users_df = store.users
+announcements_df = store.announcements
+notifications_df = store.notifications
+doc_types_df = store.document_types
 
-# Convert date columns
-if not documents_df.empty:
-    documents_df['created_at'] = pd.to_datetime(documents_df['created_at'])
-    documents_df['updated_at'] = pd.to_datetime(documents_df['updated_at'])
-
-if not users_df.empty:
-    users_df['created_at'] = pd.to_datetime(users_df['created_at'])
-    users_df['updated_at'] = pd.to_datetime(users_df['updated_at'])
+# Dashboard Header
+st.markdown('<h1 class="main-header">ISPSC Tagudin DMS Analytics Dashboard</h1>', unsafe_allow_html=True)
 
-if not announcements_df.empty:
-    announcements_df['created_at'] = pd.to_datetime(announcements_df['created_at'])
-    announcements_df['publish_at'] = pd.to_datetime(announcements_df['publish_at'])
-    announcements_df['expire_at'] = pd.to_datetime(announcements_df['expire_at'])
+# Rerun the session as soon as the change log reports new data
+@st.fragment(run_every=CHANGE_POLL_SECONDS)
+def watch_data_version(loaded_versions):
+    if get_table_versions() != loaded_versions:
+        st.rerun(scope="app")
+    if SNAPSHOT_KEY in loaded_versions:
+        st.warning(f"📦 Offline mode: showing a snapshot taken {store.loaded_at.strftime('%Y-%m-%d %H:%M:%S')}, not live data.")
+    else:
+        st.caption(f"Data as of {store.loaded_at.strftime('%Y-%m-%d %H:%M:%S')}")
+
+watch_data_version(store.versions)
+
+# Department scope: precomputed visibility masks, selectable from the sidebar or the URL
+# (?role=Department+Head&department=...) so department heads can bookmark their view
+visibility = get_visibility_index(store.version, store)
+view_roles = ["Administrator", "Department Head"]
+
+with st.sidebar:
+    st.header("👤 View")
+    requested_role = st.query_params.get('role')
+    view_role = st.selectbox(
+        "View As", view_roles,
+        index=view_roles.index(requested_role) if requested_role in view_roles else 0
+    )
+    view_department = None
+    if view_role != "Administrator" and visibility.departments:
+        requested_department = st.query_params.get('department')
+        view_department = st.selectbox(
+            "Department", visibility.departments,
+            index=visibility.departments.index(requested_department) if requested_department in visibility.departments else 0
+        )
+    elif view_role != "Administrator":
+        st.info("No departments found; showing public documents only.")
+    st.query_params['role'] = view_role
+    if view_department:
+        st.query_params['department'] = view_department
+    elif 'department' in st.query_params:
+        del st.query_params['department']
 
-if not notifications_df.empty:
-    notifications_df['created_at'] = pd.to_datetime(notifications_df['created_at'])
+scope = department_scope('admin' if view_role == "Administrator" else 'head', view_department)
+visible = visibility.masks(scope)
 
-# Dashboard Header
-st.markdown('<h1 class="main-header">ISPSC Tagudin DMS Analytics Dashboard</h1>', unsafe_allow_html=True)
+# Campus-wide activity anomalies; new hourly and daily buckets are scored as they close
+anomaly_hour = store.activity_hour()
+anomalies = activity_anomalies(store, anomaly_hour)
 
 # PDF Export Section
 st.markdown("---")
@@ -453,19 +288,38 @@ with col4:
 with col5:
     if st.button('📄 Generate PDF Report', help="Click to generate and download a comprehensive PDF report"):
         with st.spinner('Generating comprehensive PDF report...'):
-            pdf_bytes = create_pdf_report(documents_df, users_df, announcements_df, notifications_df)
+            pdf_bytes = create_pdf_report(
+                apply_mask(documents_df, visible['documents']),
+                apply_mask(users_df, visible['users']),
+                apply_mask(announcements_df, visible['announcements']),
+                apply_mask(notifications_df, visible['notifications']),
+                subtitle=None if scope is None else f"Department: {scope}" if scope else "Public documents only",
+                anomalies=anomalies
+            )
             
             # Create download link with better styling
             b64 = base64.b64encode(pdf_bytes).decode()
             href = f'<a href="data:application/pdf;base64,{b64}" download="ispsc_dms_analytics_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf" class="download-button">📥 Download PDF Report</a>'
             st.markdown(href, unsafe_allow_html=True)
             st.success('✅ PDF report generated successfully! Click the download button above.')
+    
+    # Per-department and per-type reports, rendered in parallel (campus-wide view only)
+    if scope is None and st.button('📦 Generate Report Bundle', help="One PDF report per department and per document type, packed into a zip"):
+        with st.spinner('Generating department and document type reports...'):
+            bundle = build_report_bundle(store, visibility)
+            
+            b64 = base64.b64encode(bundle.zip_bytes).decode()
+            href = f'<a href="data:application/zip;base64,{b64}" download="ispsc_dms_reports_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip" class="download-button">📥 Download Report Bundle</a>'
+            st.markdown(href, unsafe_allow_html=True)
+            st.success(f'✅ {len(bundle.rendered)} reports generated.')
+            for path, error in bundle.failures:
+                st.warning(f'{path} failed: {error}')
 
 # Key Metrics
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_docs = len(documents_df) if not documents_df.empty else 0
+    total_docs = count_visible(documents_df, visible['documents']) if not documents_df.empty else 0
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-value">{total_docs}</div>
@@ -474,7 +328,7 @@ with col1:
     """, unsafe_allow_html=True)
 
 with col2:
-    active_users = len(users_df[users_df['status'] == 'active']) if not users_df.empty else 0
+    active_users = count_visible(users_df, visible['users'], users_df['status'] == 'active') if not users_df.empty else 0
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-value">{active_users}</div>
@@ -483,7 +337,7 @@ with col2:
     """, unsafe_allow_html=True)
 
 with col3:
-    published_announcements = len(announcements_df[announcements_df['status'] == 'published']) if not announcements_df.empty else 0
+    published_announcements = count_visible(announcements_df, visible['announcements'], announcements_df['status'] == 'published') if not announcements_df.empty else 0
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-value">{published_announcements}</div>
@@ -492,7 +346,7 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    recent_notifications = len(notifications_df[notifications_df['created_at'] > (datetime.now() - timedelta(days=7))]) if not notifications_df.empty else 0
+    recent_notifications = count_visible(notifications_df, visible['notifications'], notifications_df['created_at'] > (datetime.now() - timedelta(days=7))) if not notifications_df.empty else 0
     st.markdown(f"""
     <div class="metric-card">
         <div class="metric-value">{recent_notifications}</div>
@@ -548,11 +402,12 @@ with tab1:
         
         # Apply filters
         filtered_documents = filter_documents(
-            documents_df, status_filter, type_filter, date_range, creator_filter
+            documents_df, status_filter, type_filter, date_range, creator_filter,
+            visible_mask=visible['documents']
         )
         
         # Show filtered results count
-        st.info(f"📊 Showing {len(filtered_documents)} documents (filtered from {len(documents_df)} total)")
+        st.info(f"📊 Showing {len(filtered_documents)} documents (filtered from {count_visible(documents_df, visible['documents'])} total)")
         
         # Download filtered data
         if len(filtered_documents) > 0:
@@ -561,53 +416,99 @@ with tab1:
             href = f'<a href="data:file/csv;base64,{b64}" download="filtered_documents_{datetime.now().strftime("%Y%m%d")}.csv" class="download-button">📥 Download Filtered Documents (CSV)</a>'
             st.markdown(href, unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
+        # Figures are memoized per data version and filter state
+        doc_filter_state = (scope, status_filter, type_filter, tuple(date_range), creator_filter)
         
-        with col1:
-            # Document status distribution
+        def build_status_figure():
             status_counts = filtered_documents['status'].value_counts()
-            fig_status = px.pie(
+            return px.pie(
                 values=status_counts.values, 
                 names=status_counts.index,
                 title="Document Status Distribution"
             )
+        
+        def build_type_figure():
+            type_counts = filtered_documents['doc_type'].value_counts()
+            return horizontal_bar(type_counts, "Document Types Distribution", 'Count', 'Document Type')
+        
+        # Creator leaderboard from the shared creator activity index
+        document_activity = get_creator_activity('documents', store.versions['documents'], documents_df)
+        doc_date_only = scope is None and status_filter == "All" and type_filter == "All" and creator_filter == "All"
+        
+        def build_creators_figure():
+            board = view_leaderboard(document_activity, documents_df, filtered_documents, date_range, doc_date_only)
+            return horizontal_bar(board.set_index('creator')['count'], "Top Document Creators", 'Number of Documents', 'Creator')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Document status distribution
+            fig_status = cached_figure('documents_status', store.versions['documents'], doc_filter_state, build_status_figure)
             st.plotly_chart(fig_status, use_container_width=True)
             
         with col2:
             # Document type distribution
             if 'doc_type' in filtered_documents.columns:
-                type_counts = filtered_documents['doc_type'].value_counts()
-                fig_type = px.bar(
-                    x=type_counts.values,
-                    y=type_counts.index,
-                    orientation='h',
-                    title="Document Types Distribution",
-                    labels={'x': 'Count', 'y': 'Document Type'}
-                )
+                fig_type = cached_figure('documents_type', store.versions['documents'], doc_filter_state, build_type_figure)
                 st.plotly_chart(fig_type, use_container_width=True)
         
         # Documents created over time
-        filtered_documents['created_date'] = filtered_documents['created_at'].dt.date
-        daily_docs = filtered_documents.groupby('created_date').size().reset_index(name='count')
-        
-        fig_timeline = px.line(
-            daily_docs, 
-            x='created_date', 
-            y='count',
-            title="Documents Created Over Time"
+        fig_timeline = cached_figure(
+            'documents_timeline', store.versions['documents'], (doc_filter_state, anomaly_hour),
+            lambda: highlight_intervals(
+                timeline_figure(filtered_documents['created_at'], "Documents Created Over Time"),
+                anomalies[anomalies['stream'] == 'documents'],
+                filtered_documents['created_at'].min(), filtered_documents['created_at'].max()
+            )
         )
         st.plotly_chart(fig_timeline, use_container_width=True)
         
         # Top document creators
-        creator_counts = filtered_documents['created_by_name'].value_counts().head(10)
-        fig_creators = px.bar(
-            x=creator_counts.values,
-            y=creator_counts.index,
-            orientation='h',
-            title="Top Document Creators",
-            labels={'x': 'Number of Documents', 'y': 'Creator'}
-        )
+        fig_creators = cached_figure('documents_creators', store.versions['documents'], doc_filter_state, build_creators_figure)
         st.plotly_chart(fig_creators, use_container_width=True)
+        show_creator_drilldown(document_activity, documents_df, filtered_documents, date_range, doc_date_only, 'documents')
+        
+        # Document lifecycle
+        st.subheader("⏱️ Document Lifecycle")
+        lifecycle = document_lifecycle_summary(filtered_documents, notifications_df)
+        if lifecycle:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Updated After Creation", f"{lifecycle['documents_updated_share']:.0%}")
+            median_days = lifecycle['median_days_to_update']
+            col2.metric("Median Days to Update", f"{median_days:.1f}" if median_days is not None else "-")
+            col3.metric("Awaiting First Update", lifecycle['document_backlog'])
+            col4.metric("Deleted", lifecycle['documents_deleted'])
+        
+        def build_backlog_figure():
+            curves, bucket = document_backlog(filtered_documents, notifications_df)
+            return px.line(
+                curves,
+                x='date',
+                y=['live', 'backlog', 'deleted'],
+                title="Document Backlog Over Time" if bucket == 'day' else f"Document Backlog Over Time (per {bucket})",
+                labels={'date': bucket.capitalize(), 'value': 'Documents', 'variable': 'Series'}
+            )
+        
+        def build_time_to_update_figure():
+            # Binned here so the figure holds 50 bars whatever the number of documents
+            histogram = time_to_update_histogram(filtered_documents)
+            return px.bar(
+                histogram,
+                x=(histogram['start'] + histogram['end']) / 2,
+                y='documents',
+                title="Time to Update (days)",
+                labels={'x': 'Days from Creation to Last Update', 'documents': 'Documents'}
+            ).update_traces(width=histogram['end'] - histogram['start']).update_layout(bargap=0)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig_backlog = cached_figure('documents_backlog', (store.versions['documents'], store.versions['notifications']), doc_filter_state, build_backlog_figure)
+            st.plotly_chart(fig_backlog, use_container_width=True)
+        
+        with col2:
+            fig_time_to_update = cached_figure('documents_time_to_update', store.versions['documents'], doc_filter_state, build_time_to_update_figure)
+            st.plotly_chart(fig_time_to_update, use_container_width=True)
         
         # Filtered data table
         st.subheader("📋 Filtered Documents Data")
@@ -658,11 +559,12 @@ with tab2:
         
         # Apply filters
         filtered_users = filter_users(
-            users_df, status_filter, role_filter, dept_filter, date_range
+            users_df, status_filter, role_filter, dept_filter, date_range,
+            visible_mask=visible['users']
         )
         
         # Show filtered results count
-        st.info(f"👥 Showing {len(filtered_users)} users (filtered from {len(users_df)} total)")
+        st.info(f"👥 Showing {len(filtered_users)} users (filtered from {count_visible(users_df, visible['users'])} total)")
         
         # Download filtered data
         if len(filtered_users) > 0:
@@ -671,52 +573,82 @@ with tab2:
             href = f'<a href="data:file/csv;base64,{b64}" download="filtered_users_{datetime.now().strftime("%Y%m%d")}.csv" class="download-button">📥 Download Filtered Users (CSV)</a>'
             st.markdown(href, unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
+        # Figures are memoized per data version and filter state
+        user_filter_state = (scope, status_filter, role_filter, dept_filter, tuple(date_range))
         
-        with col1:
-            # User status distribution
+        def build_user_status_figure():
             status_counts = filtered_users['status'].value_counts()
-            fig_user_status = px.pie(
+            return px.pie(
                 values=status_counts.values, 
                 names=status_counts.index,
                 title="User Status Distribution"
             )
-            st.plotly_chart(fig_user_status, use_container_width=True)
-            
-        with col2:
-            # User role distribution
+        
+        def build_user_role_figure():
             role_counts = filtered_users['role'].value_counts()
-            fig_user_role = px.pie(
+            return px.pie(
                 values=role_counts.values, 
                 names=role_counts.index,
                 title="User Role Distribution"
             )
+        
+        def build_dept_figure():
+            dept_counts = filtered_users['department'].value_counts()
+            return horizontal_bar(dept_counts, "Users by Department", 'Number of Users', 'Department')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # User status distribution
+            fig_user_status = cached_figure('users_status', store.versions['users'], user_filter_state, build_user_status_figure)
+            st.plotly_chart(fig_user_status, use_container_width=True)
+            
+        with col2:
+            # User role distribution
+            fig_user_role = cached_figure('users_role', store.versions['users'], user_filter_state, build_user_role_figure)
             st.plotly_chart(fig_user_role, use_container_width=True)
         
         # Department distribution
         if 'department' in filtered_users.columns:
-            dept_counts = filtered_users['department'].value_counts()
-            fig_dept = px.bar(
-                x=dept_counts.values,
-                y=dept_counts.index,
-                orientation='h',
-                title="Users by Department",
-                labels={'x': 'Number of Users', 'y': 'Department'}
-            )
+            fig_dept = cached_figure('users_department', store.versions['users'], user_filter_state, build_dept_figure)
             st.plotly_chart(fig_dept, use_container_width=True)
         
         # Users created over time
-        filtered_users['created_date'] = filtered_users['created_at'].dt.date
-        daily_users = filtered_users.groupby('created_date').size().reset_index(name='count')
-        
-        fig_user_timeline = px.line(
-            daily_users, 
-            x='created_date', 
-            y='count',
-            title="User Registrations Over Time"
+        fig_user_timeline = cached_figure(
+            'users_timeline', store.versions['users'], user_filter_state,
+            lambda: timeline_figure(filtered_users['created_at'], "User Registrations Over Time")
         )
         st.plotly_chart(fig_user_timeline, use_container_width=True)
         
+        # Registration cohorts against their activity in later months
+        st.subheader("📅 Cohort Retention")
+        cohort_versions = (store.versions['users'], store.versions['documents'], store.versions['notifications'])
+        cohort_engine = get_cohort_engine(cohort_versions, store)
+        cohort_source = st.selectbox("Activity", list(ACTIVITY_SOURCES), format_func=ACTIVITY_SOURCES.get, key='cohort_source')
+        
+        def build_cohort_figure():
+            # The 24 most recent cohorts keep the heatmap readable
+            retention = cohort_engine.retention(users_df.index.get_indexer(filtered_users.index), cohort_source, max_cohorts=24)
+            return px.imshow(
+                retention,
+                text_auto='.0%',
+                zmin=0,
+                zmax=1,
+                aspect='auto',
+                color_continuous_scale='Blues',
+                title=f"Share of Each Registration Cohort Active ({ACTIVITY_SOURCES[cohort_source]})",
+                labels={'x': 'Months Since Registration', 'y': 'Registration Month', 'color': 'Active'}
+            )
+        
+        if filtered_users['created_at'].notna().any():
+            fig_cohorts = cached_figure('users_cohorts', cohort_versions, (user_filter_state, cohort_source), build_cohort_figure)
+            st.plotly_chart(fig_cohorts, use_container_width=True)
+            unattributed = sum(cohort_engine.unattributed.values())
+            if unattributed:
+                st.caption(f"{unattributed} documents and notifications could not be matched to a registered creator and are not counted.")
+        else:
+            st.info("No registered users in this view.")
+        
         # Filtered data table
         st.subheader("📋 Filtered Users Data")
         st.dataframe(filtered_users[['Username', 'firstname', 'lastname', 'role', 'status', 'department', 'created_at']].head(10))
@@ -763,11 +695,12 @@ with tab3:
         
         # Apply filters
         filtered_announcements = filter_announcements(
-            announcements_df, status_filter, visibility_filter, date_range, creator_filter
+            announcements_df, status_filter, visibility_filter, date_range, creator_filter,
+            visible_mask=visible['announcements']
         )
         
         # Show filtered results count
-        st.info(f"📢 Showing {len(filtered_announcements)} announcements (filtered from {len(announcements_df)} total)")
+        st.info(f"📢 Showing {len(filtered_announcements)} announcements (filtered from {count_visible(announcements_df, visible['announcements'])} total)")
         
         # Download filtered data
         if len(filtered_announcements) > 0:
@@ -776,50 +709,70 @@ with tab3:
             href = f'<a href="data:file/csv;base64,{b64}" download="filtered_announcements_{datetime.now().strftime("%Y%m%d")}.csv" class="download-button">📥 Download Filtered Announcements (CSV)</a>'
             st.markdown(href, unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
+        # Figures are memoized per data version and filter state
+        announce_filter_state = (scope, status_filter, visibility_filter, tuple(date_range), creator_filter)
         
-        with col1:
-            # Announcement status distribution
+        def build_announce_status_figure():
             status_counts = filtered_announcements['status'].value_counts()
-            fig_announce_status = px.pie(
+            return px.pie(
                 values=status_counts.values, 
                 names=status_counts.index,
                 title="Announcement Status Distribution"
             )
-            st.plotly_chart(fig_announce_status, use_container_width=True)
-            
-        with col2:
-            # Visibility distribution
+        
+        def build_visibility_figure():
             visibility_counts = filtered_announcements['visible_to_all'].value_counts()
-            fig_visibility = px.pie(
+            return px.pie(
                 values=visibility_counts.values, 
                 names=visibility_counts.index.map({1: 'Visible to All', 0: 'Restricted'}),
                 title="Announcement Visibility"
             )
+        
+        # Creator leaderboard from the shared creator activity index
+        announcement_activity = get_creator_activity('announcements', store.versions['announcements'], announcements_df)
+        announce_date_only = scope is None and status_filter == "All" and visibility_filter == "All" and creator_filter == "All"
+        
+        def build_announce_creators_figure():
+            board = view_leaderboard(announcement_activity, announcements_df, filtered_announcements, date_range, announce_date_only)
+            return horizontal_bar(board.set_index('creator')['count'], "Top Announcement Creators", 'Number of Announcements', 'Creator')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Announcement status distribution
+            fig_announce_status = cached_figure('announcements_status', store.versions['announcements'], announce_filter_state, build_announce_status_figure)
+            st.plotly_chart(fig_announce_status, use_container_width=True)
+            
+        with col2:
+            # Visibility distribution
+            fig_visibility = cached_figure('announcements_visibility', store.versions['announcements'], announce_filter_state, build_visibility_figure)
             st.plotly_chart(fig_visibility, use_container_width=True)
         
         # Announcements created over time
-        filtered_announcements['created_date'] = filtered_announcements['created_at'].dt.date
-        daily_announcements = filtered_announcements.groupby('created_date').size().reset_index(name='count')
-        
-        fig_announce_timeline = px.line(
-            daily_announcements, 
-            x='created_date', 
-            y='count',
-            title="Announcements Created Over Time"
+        fig_announce_timeline = cached_figure(
+            'announcements_timeline', store.versions['announcements'], announce_filter_state,
+            lambda: timeline_figure(filtered_announcements['created_at'], "Announcements Created Over Time")
         )
         st.plotly_chart(fig_announce_timeline, use_container_width=True)
         
         # Top announcement creators
-        creator_counts = filtered_announcements['created_by_name'].value_counts().head(10)
-        fig_announce_creators = px.bar(
-            x=creator_counts.values,
-            y=creator_counts.index,
-            orientation='h',
-            title="Top Announcement Creators",
-            labels={'x': 'Number of Announcements', 'y': 'Creator'}
-        )
+        fig_announce_creators = cached_figure('announcements_creators', store.versions['announcements'], announce_filter_state, build_announce_creators_figure)
         st.plotly_chart(fig_announce_creators, use_container_width=True)
+        show_creator_drilldown(announcement_activity, announcements_df, filtered_announcements, date_range, announce_date_only, 'announcements')
+        
+        # Active versus expired announcement windows
+        def build_windows_figure():
+            curves, bucket = announcement_windows(filtered_announcements)
+            return px.area(
+                curves,
+                x='date',
+                y=['active', 'scheduled', 'expired'],
+                title="Announcement Windows Over Time" if bucket == 'day' else f"Announcement Windows Over Time (per {bucket})",
+                labels={'date': bucket.capitalize(), 'value': 'Announcements', 'variable': 'State'}
+            )
+        
+        fig_windows = cached_figure('announcements_windows', store.versions['announcements'], announce_filter_state, build_windows_figure)
+        st.plotly_chart(fig_windows, use_container_width=True)
         
         # Filtered data table
         st.subheader("📋 Filtered Announcements Data")
@@ -857,11 +810,12 @@ with tab4:
         
         # Apply filters
         filtered_notifications = filter_notifications(
-            notifications_df, type_filter, date_range
+            notifications_df, type_filter, date_range,
+            visible_mask=visible['notifications']
         )
         
         # Show filtered results count
-        st.info(f"🔔 Showing {len(filtered_notifications)} notifications (filtered from {len(notifications_df)} total)")
+        st.info(f"🔔 Showing {len(filtered_notifications)} notifications (filtered from {count_visible(notifications_df, visible['notifications'])} total)")
         
         # Download filtered data
         if len(filtered_notifications) > 0:
@@ -870,27 +824,45 @@ with tab4:
             href = f'<a href="data:file/csv;base64,{b64}" download="filtered_notifications_{datetime.now().strftime("%Y%m%d")}.csv" class="download-button">📥 Download Filtered Notifications (CSV)</a>'
             st.markdown(href, unsafe_allow_html=True)
         
+        # Figures are memoized per data version and filter state
+        notif_filter_state = (scope, type_filter, tuple(date_range))
+        
+        def build_notif_type_figure():
+            type_counts = filtered_notifications['type'].value_counts()
+            return px.pie(
+                values=type_counts.values, 
+                names=type_counts.index,
+                title="Notification Types Distribution"
+            )
+        
         # Notification type distribution
-        type_counts = filtered_notifications['type'].value_counts()
-        fig_notif_type = px.pie(
-            values=type_counts.values, 
-            names=type_counts.index,
-            title="Notification Types Distribution"
-        )
+        fig_notif_type = cached_figure('notifications_type', store.versions['notifications'], notif_filter_state, build_notif_type_figure)
         st.plotly_chart(fig_notif_type, use_container_width=True)
         
         # Notifications over time
-        filtered_notifications['created_date'] = filtered_notifications['created_at'].dt.date
-        daily_notifications = filtered_notifications.groupby('created_date').size().reset_index(name='count')
-        
-        fig_notif_timeline = px.line(
-            daily_notifications, 
-            x='created_date', 
-            y='count',
-            title="Notifications Over Time"
+        fig_notif_timeline = cached_figure(
+            'notifications_timeline', store.versions['notifications'], (notif_filter_state, anomaly_hour),
+            lambda: highlight_intervals(
+                timeline_figure(filtered_notifications['created_at'], "Notifications Over Time"),
+                anomalies[anomalies['stream'] == 'notifications'],
+                filtered_notifications['created_at'].min(), filtered_notifications['created_at'].max()
+            )
         )
         st.plotly_chart(fig_notif_timeline, use_container_width=True)
         
+        # Flagged activity intervals
+        with st.expander(f"🚨 Activity Anomalies ({len(anomalies)})"):
+            st.caption("Campus-wide spikes (red), drops (orange) and stops (grey) in hourly and daily activity, "
+                       "against the same hour or weekday over the previous weeks.")
+            if anomalies.empty:
+                st.info("No anomalies detected.")
+            else:
+                st.dataframe(
+                    anomalies.sort_values('start', ascending=False)[['stream', 'granularity', 'kind', 'start', 'end', 'count', 'expected', 'peak_score']]
+                    .round({'expected': 1, 'peak_score': 1}),
+                    hide_index=True
+                )
+        
         # Filtered activity table
         st.subheader("📋 Filtered System Activity")
         filtered_activity = filtered_notifications.sort_values('created_at', ascending=False).head(10)
@@ -903,24 +875,27 @@ summary_col1, summary_col2, summary_col3 = st.columns(3)
 with summary_col1:
     st.subheader("Documents Summary")
     if not documents_df.empty:
-        st.dataframe(documents_df[['title', 'status', 'created_by_name', 'created_at']].head(5))
-        st.markdown(get_table_download_link(documents_df, "documents.csv", "Download Documents Data"), unsafe_allow_html=True)
+        scoped_documents = apply_mask(documents_df, visible['documents'])
+        st.dataframe(scoped_documents[['title', 'status', 'created_by_name', 'created_at']].head(5))
+        st.markdown(get_table_download_link(scoped_documents, "documents.csv", "Download Documents Data"), unsafe_allow_html=True)
     else:
         st.info("No document data available.")
 
 with summary_col2:
     st.subheader("Users Summary")
     if not users_df.empty:
-        st.dataframe(users_df[['Username', 'role', 'status', 'created_at']].head(5))
-        st.markdown(get_table_download_link(users_df, "users.csv", "Download Users Data"), unsafe_allow_html=True)
+        scoped_users = apply_mask(users_df, visible['users'])
+        st.dataframe(scoped_users[['Username', 'role', 'status', 'created_at']].head(5))
+        st.markdown(get_table_download_link(scoped_users, "users.csv", "Download Users Data"), unsafe_allow_html=True)
     else:
         st.info("No user data available.")
 
 with summary_col3:
     st.subheader("Announcements Summary")
     if not announcements_df.empty:
-        st.dataframe(announcements_df[['title', 'status', 'created_by_name', 'created_at']].head(5))
-        st.markdown(get_table_download_link(announcements_df, "announcements.csv", "Download Announcements Data"), unsafe_allow_html=True)
+        scoped_announcements = apply_mask(announcements_df, visible['announcements'])
+        st.dataframe(scoped_announcements[['title', 'status', 'created_by_name', 'created_at']].head(5))
+        st.markdown(get_table_download_link(scoped_announcements, "announcements.csv", "Download Announcements Data"), unsafe_allow_html=True)
     else:
         st.info("No announcement data available.")
 
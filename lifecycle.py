@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from charts import TIMELINE_BUCKETS, timeline_bucket
+
+# Lifecycle analytics
+# Every curve is a sorted event sweep: the number of intervals open at time t is
+# (#starts <= t) - (#ends <= t), answered for a whole grid of t with searchsorted.
+def to_ns(values):
+    """Datetime-like values as sorted int64 nanoseconds, NaT dropped"""
+    values = pd.to_datetime(pd.Series(values)).dropna()
+    return np.sort(values.to_numpy(dtype='datetime64[ns]').view('int64'))
+
+def count_at_or_before(sorted_events, grid):
+    """Number of events at or before each grid timestamp"""
+    return np.searchsorted(sorted_events, grid.to_numpy(dtype='datetime64[ns]').view('int64'), side='right')
+
+def timeline_grid(start, end):
+    """Sampling grid for a lifecycle curve, bucketed like the other timelines"""
+    bucket = timeline_bucket(start, end)
+    grid = pd.date_range(start.normalize(), end.normalize() + pd.Timedelta(days=1), freq=TIMELINE_BUCKETS[bucket])
+    return grid, bucket
+
+def time_to_update(documents_df):
+    """Days between creation and last update, for documents that were updated after creation"""
+    if documents_df.empty:
+        return pd.Series(dtype='float64')
+    created = documents_df['created_at'].to_numpy(dtype='datetime64[ns]')
+    updated = documents_df['updated_at'].to_numpy(dtype='datetime64[ns]')
+    delta = (updated - created).astype('timedelta64[s]').astype('float64') / 86400
+    delta = delta[~np.isnan(delta) & (delta > 0)]
+    return pd.Series(delta, name='days_to_update')
+
+def time_to_update_histogram(documents_df, bins=50):
+    """Documents per time-to-update bin over fixed edges from 0 to the longest time,
+    so a chart gets one bar per bin rather than one value per document"""
+    days = time_to_update(documents_df).to_numpy()
+    counts, edges = np.histogram(days, bins=np.linspace(0, days.max() if len(days) else 1, bins + 1))
+    return pd.DataFrame({'start': edges[:-1], 'end': edges[1:], 'documents': counts})
+
+def deleted_mask(documents_df):
+    return documents_df['deleted'].fillna(0).astype(int).to_numpy() != 0
+
+def first_updates(documents_df, notifications_df=None):
+    """When each document was first updated after creation, NaT if never.
+    updated_at only holds the last update, so the earliest 'updated' notification
+    about the document is used when there is one; updated_at is the fallback."""
+    created_at = documents_df['created_at'].reset_index(drop=True)
+    updated_at = documents_df['updated_at'].reset_index(drop=True)
+    first = updated_at.where(updated_at > created_at)
+    if notifications_df is None or notifications_df.empty:
+        return first
+
+    updates = notifications_df.loc[
+        (notifications_df['type'] == 'updated') & notifications_df['related_doc_id'].notna(),
+        ['related_doc_id', 'created_at']
+    ]
+    events = pd.DataFrame({
+        'position': np.arange(len(documents_df)),
+        'doc_id': documents_df['doc_id'].to_numpy(),
+        'created': created_at.to_numpy(),
+    }).merge(
+        pd.DataFrame({'doc_id': updates['related_doc_id'].astype('int64').to_numpy(), 'updated': updates['created_at'].to_numpy()}),
+        on='doc_id'
+    )
+    events = events[events['updated'] > events['created']]
+    notified = events.groupby('position')['updated'].min().reindex(range(len(documents_df)))
+    return pd.concat([first, notified], axis=1).min(axis=1)
+
+def document_backlog(documents_df, notifications_df=None):
+    """Live, deleted and not-yet-updated document counts over time"""
+    if documents_df.empty:
+        return pd.DataFrame(columns=['date', 'live', 'deleted', 'backlog']), 'day'
+
+    created_at = documents_df['created_at']
+    updated_at = documents_df['updated_at']
+    deleted = deleted_mask(documents_df)
+
+    created = to_ns(created_at)
+    # Deleted documents leave the live set at their last update
+    deletions = to_ns(updated_at[deleted])
+    # A document leaves the backlog the first time it is updated after creation
+    updated = to_ns(first_updates(documents_df, notifications_df)[~deleted])
+
+    grid, bucket = timeline_grid(created_at.min(), updated_at.max() if updated_at.notna().any() else created_at.max())
+    created_count = count_at_or_before(created, grid)
+    deleted_count = count_at_or_before(deletions, grid)
+    updated_count = count_at_or_before(updated, grid)
+
+    curves = pd.DataFrame({
+        'date': grid,
+        'live': created_count - deleted_count,
+        'deleted': deleted_count,
+        'backlog': created_count - deleted_count - updated_count,
+    })
+    return curves, bucket
+
+def announcement_windows(announcements_df):
+    """Scheduled, active and expired announcement counts over time"""
+    if announcements_df.empty:
+        return pd.DataFrame(columns=['date', 'scheduled', 'active', 'expired']), 'day'
+
+    # Scheduled from creation until a later publish_at; drafts without publish_at are never scheduled
+    ahead = (announcements_df['publish_at'] > announcements_df['created_at']).to_numpy()
+    scheduled_from = to_ns(announcements_df['created_at'][ahead])
+    scheduled_until = to_ns(announcements_df['publish_at'][ahead])
+    published = to_ns(announcements_df['publish_at'])
+    # Announcements without an expiry stay active indefinitely
+    expired = to_ns(announcements_df['expire_at'][announcements_df['publish_at'].notna()])
+
+    bounds = pd.concat([announcements_df['created_at'], announcements_df['publish_at'], announcements_df['expire_at']]).dropna()
+    grid, bucket = timeline_grid(bounds.min(), min(bounds.max(), pd.Timestamp.now() + pd.Timedelta(days=90)))
+    published_count = count_at_or_before(published, grid)
+    expired_count = count_at_or_before(expired, grid)
+
+    curves = pd.DataFrame({
+        'date': grid,
+        'scheduled': count_at_or_before(scheduled_from, grid) - count_at_or_before(scheduled_until, grid),
+        'active': published_count - expired_count,
+        'expired': expired_count,
+    })
+    return curves, bucket
+
+def document_lifecycle_summary(documents_df, notifications_df=None):
+    """Time-to-update, backlog and deletion figures for a set of documents"""
+    if documents_df.empty:
+        return {}
+    days = time_to_update(documents_df)
+    deleted = deleted_mask(documents_df)
+    touched = first_updates(documents_df, notifications_df).notna().to_numpy()
+    return {
+        'documents_updated': len(days),
+        'documents_updated_share': len(days) / len(documents_df),
+        'median_days_to_update': float(days.median()) if len(days) else None,
+        'p90_days_to_update': float(days.quantile(0.9)) if len(days) else None,
+        'documents_deleted': int(deleted.sum()),
+        'document_backlog': int((~touched & ~deleted).sum()),
+    }
+
+def announcement_window_summary(announcements_df, now=None):
+    """Active, expired and scheduled announcement counts at a point in time"""
+    if announcements_df.empty:
+        return {}
+    now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+    publish_at = announcements_df['publish_at']
+    expire_at = announcements_df['expire_at']
+    published = (publish_at <= now).to_numpy()
+    not_expired = (expire_at.isna() | (expire_at > now)).to_numpy()
+    return {
+        'announcements_active': int((published & not_expired).sum()),
+        'announcements_expired': int((published & ~not_expired).sum()),
+        'announcements_scheduled': int((publish_at > now).sum()),
+    }
+
+def lifecycle_summary(documents_df, announcements_df, now=None, notifications_df=None):
+    """Headline lifecycle figures for the PDF report"""
+    return {**document_lifecycle_summary(documents_df, notifications_df), **announcement_window_summary(announcements_df, now)}
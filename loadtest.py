@@ -0,0 +1,240 @@
+# Load test for the analytics dashboard
+#
+# Drives ispsc.py headlessly with N simulated sessions (Streamlit AppTest), each
+# making random filter changes across the four tabs and PDF exports (CSV export
+# links are rendered on every rerun). Runs against an SQLite stand-in seeded
+# with synthetic data, against the MySQL database configured in
+# data_store.create_connection with --mysql, or against a fixed snapshot file
+# with --snapshot for benchmarks that are reproducible across machines.
+#
+#   python loadtest.py --sessions 20 --interactions 15 --concurrency 8
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from streamlit.runtime.state.common import TESTING_KEY
+from streamlit.testing.v1 import AppTest
+
+import data_store
+import synthetic
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ispsc.py')
+
+PDF_BUTTON_LABEL = '📄 Generate PDF Report'
+
+class QueryCounter:
+    """Counts database statements issued by the app while the test runs"""
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def increment(self, *args):
+        with self.lock:
+            self.count += 1
+
+def install_sqlite_standin(path, counter):
+    """Point the app's loaders at the SQLite stand-in and count every statement"""
+    def create_connection():
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.set_trace_callback(counter.increment)
+        return conn
+    data_store.create_connection = create_connection
+
+def install_mysql_counter(counter):
+    """Count MySQL round trips; the app opens one connection per query"""
+    create_connection = data_store.create_connection
+
+    def counting_connection():
+        counter.increment()
+        return create_connection()
+    data_store.create_connection = counting_connection
+
+def select_index(widget, index):
+    """Select a selectbox option by position. AppTest keeps the option's display label as
+    the value and passes it through the widget's format_func again when sending the state,
+    which fails for a format_func that maps values to labels (e.g. dict.get), so the label
+    is sent as displayed."""
+    widget.select_index(index)
+    widget.root.session_state[TESTING_KEY][widget.id] = str
+
+def random_interaction(at, rng, pdf_probability):
+    """Apply one random filter change or PDF export to the session and return its label"""
+    if rng.random() < pdf_probability:
+        for button in at.button:
+            if button.label == PDF_BUTTON_LABEL:
+                button.click()
+                return 'pdf_export'
+
+    widgets = [('select', widget) for widget in at.selectbox] + [('date', widget) for widget in at.date_input]
+    kind, widget = rng.choice(widgets)
+
+    if kind == 'date':
+        span = (widget.max - widget.min).days
+        offset = rng.randint(0, span)
+        length = rng.randint(0, span - offset)
+        start = widget.min + timedelta(days=offset)
+        widget.set_value((start, start + timedelta(days=length)))
+    else:
+        select_index(widget, rng.randrange(len(widget.options)))
+
+    return f'{kind}:{widget.label}'
+
+def run_session(session_id, interactions, pdf_probability, timeout, seed):
+    """Open one session, perform its interactions and return the AppTest with its timings"""
+    rng = random.Random(seed * 100003 + session_id)
+    timings = []
+
+    started = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    timings.append(('first_load', time.perf_counter() - started, len(at.exception)))
+
+    for _ in range(interactions):
+        action = random_interaction(at, rng, pdf_probability)
+        started = time.perf_counter()
+        at.run()
+        timings.append((action, time.perf_counter() - started, len(at.exception)))
+
+    return at, timings
+
+def latency_summary(seconds):
+    seconds = np.asarray(seconds) * 1000
+    if not len(seconds):
+        return {'count': 0}
+    return {
+        'count': int(len(seconds)),
+        'p50_ms': round(float(np.percentile(seconds, 50)), 1),
+        'p95_ms': round(float(np.percentile(seconds, 95)), 1),
+        'p99_ms': round(float(np.percentile(seconds, 99)), 1),
+        'max_ms': round(float(seconds.max()), 1),
+    }
+
+def run_sessions(sessions, interactions, concurrency, pdf_probability, timeout, seed):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(
+            lambda session_id: run_session(session_id, interactions, pdf_probability, timeout, seed),
+            range(sessions)
+        ))
+
+def measure_session_memory(sessions, interactions, pdf_probability, timeout, seed):
+    """Traced memory held per live session, measured separately because tracemalloc slows every rerun"""
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    results = run_sessions(sessions, interactions, 1, pdf_probability, timeout, seed + 1)
+    # The sessions are still referenced here, so their state is part of the traced memory
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return int(max(current - baseline, 0) / max(sessions, 1)), int(peak - baseline)
+
+def run_load_test(sessions, interactions, concurrency, counter, pdf_probability=0.05, timeout=300, seed=0, memory_sessions=5):
+    """Run the simulated sessions and collect latency, query and memory figures"""
+    # Cold start: the first session loads the shared store
+    queries_before = counter.count
+    started = time.perf_counter()
+    AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    cold_start = time.perf_counter() - started
+    cold_start_queries = counter.count - queries_before
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    results = run_sessions(sessions, interactions, concurrency, pdf_probability, timeout, seed)
+    wall_seconds = time.perf_counter() - started
+    queries = counter.count - queries_before
+
+    timings = [timing for _, session_timings in results for timing in session_timings]
+    del results
+    by_action = {}
+    for action, seconds, _ in timings:
+        if action != 'first_load':
+            by_action.setdefault(action.split(':')[0], []).append(seconds)
+
+    memory_per_session, peak_memory = measure_session_memory(memory_sessions, interactions, pdf_probability, timeout, seed)
+
+    return {
+        'sessions': sessions,
+        'interactions_per_session': interactions,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall_seconds, 2),
+        'cold_start_ms': round(cold_start * 1000, 1),
+        'cold_start_db_queries': cold_start_queries,
+        'first_load': latency_summary([seconds for action, seconds, _ in timings if action == 'first_load']),
+        'rerun': latency_summary([seconds for action, seconds, _ in timings if action != 'first_load']),
+        'by_action': {action: latency_summary(seconds) for action, seconds in sorted(by_action.items())},
+        'exceptions': sum(errors for _, _, errors in timings),
+        'db_queries': queries,
+        'db_queries_per_interaction': round(queries / max(len(timings), 1), 3),
+        'shared_store_bytes': data_store.get_data_store().memory_usage(),
+        'memory_sessions': memory_sessions,
+        'memory_per_session_bytes': memory_per_session,
+        'peak_traced_bytes': peak_memory,
+    }
+
+def print_report(report, backend):
+    print(f"Backend: {backend}")
+    print(f"Sessions: {report['sessions']} x {report['interactions_per_session']} interactions, concurrency {report['concurrency']}, {report['wall_seconds']} s")
+    print(f"Cold start: {report['cold_start_ms']} ms, {report['cold_start_db_queries']} DB queries")
+    for name in ('first_load', 'rerun'):
+        summary = report[name]
+        if summary['count']:
+            print(f"{name:>12}: n={summary['count']} p50={summary['p50_ms']} ms p95={summary['p95_ms']} ms p99={summary['p99_ms']} ms max={summary['max_ms']} ms")
+    for action, summary in report['by_action'].items():
+        print(f"{action:>12}: n={summary['count']} p50={summary['p50_ms']} ms p95={summary['p95_ms']} ms p99={summary['p99_ms']} ms")
+    print(f"DB queries: {report['db_queries']} ({report['db_queries_per_interaction']} per interaction)")
+    print(f"Shared store: {report['shared_store_bytes'] / 2**20:.1f} MiB")
+    print(f"Memory per session: {report['memory_per_session_bytes'] / 2**10:.1f} KiB over {report['memory_sessions']} traced sessions (peak {report['peak_traced_bytes'] / 2**20:.1f} MiB)")
+    print(f"Exceptions: {report['exceptions']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ISPSC DMS analytics dashboard")
+    parser.add_argument('--sessions', type=int, default=10, help="number of simulated sessions")
+    parser.add_argument('--interactions', type=int, default=10, help="filter changes per session")
+    parser.add_argument('--concurrency', type=int, default=4, help="sessions running at the same time")
+    parser.add_argument('--pdf-probability', type=float, default=0.05, help="chance an interaction is a PDF export")
+    parser.add_argument('--memory-sessions', type=int, default=5, help="sessions traced for memory after the latency run")
+    parser.add_argument('--mysql', action='store_true', help="use the configured MySQL database instead of the SQLite stand-in")
+    parser.add_argument('--snapshot', help="replay this snapshot file instead of querying a database")
+    parser.add_argument('--documents', type=int, default=20000, help="synthetic documents in the stand-in")
+    parser.add_argument('--notifications', type=int, default=60000, help="synthetic notifications in the stand-in")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.snapshot:
+            backend = f'snapshot {args.snapshot}'
+            os.environ[data_store.SNAPSHOT_ENV] = args.snapshot
+        elif args.mysql:
+            backend = 'mysql'
+            install_mysql_counter(counter)
+        else:
+            backend = f'sqlite stand-in ({args.documents} documents, {args.notifications} notifications)'
+            path = synthetic.create_sqlite_standin(
+                os.path.join(tmp, 'dms.sqlite'),
+                documents=args.documents,
+                notifications=args.notifications,
+                seed=args.seed
+            )
+            install_sqlite_standin(path, counter)
+
+        report = run_load_test(
+            args.sessions, args.interactions, args.concurrency, counter,
+            pdf_probability=args.pdf_probability, seed=args.seed, memory_sessions=args.memory_sessions
+        )
+
+    print_report(report, backend)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'backend': backend, **report}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,495 @@
+# Query diagnostics for the dashboard's database queries
+#
+# Runs EXPLAIN (and EXPLAIN ANALYZE with --analyze) on every query the app
+# issues, plus the filters we plan to push down into SQL. Flags full table
+# scans, filesorts and temporary tables, suggests the composite indexes that
+# would remove them and appends the measured timings to a history file so runs
+# can be compared over time.
+#
+#   python query_diagnostics.py --database dms_scratch --seed --documents 50000
+#   python query_diagnostics.py --database dms_scratch --analyze --apply
+#   python query_diagnostics.py --sqlite dms.sqlite
+#
+# --seed drops and recreates the source tables with synthetic data, so it is
+# refused on the application database.
+import argparse
+import json
+import os
+import re
+import sqlite3
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import data_store
+import synthetic
+
+APP_DATABASE = 'ispsc_tagudin_dms_db'
+
+# Filters the dashboard applies in pandas today and that are candidates for pushdown
+PUSHDOWN_QUERIES = {
+    'documents_by_status_date': """
+        SELECT doc_id, created_at FROM dms_documents
+        WHERE status = 'active' AND created_at >= '2024-01-01'
+        ORDER BY created_at
+    """,
+    'documents_by_department': """
+        SELECT dd.doc_id FROM document_departments dd
+        WHERE dd.department_id = 3
+    """,
+    'notifications_by_date': """
+        SELECT notification_id, type, created_at FROM notifications
+        WHERE created_at >= '2024-01-01'
+        ORDER BY created_at
+    """,
+    'notifications_by_document': """
+        SELECT notification_id, created_at FROM notifications
+        WHERE related_doc_id = 1
+    """,
+    'announcements_active': """
+        SELECT announcement_id, publish_at, expire_at FROM announcements
+        WHERE status = 'published' AND publish_at <= '2024-06-30'
+        ORDER BY publish_at
+    """,
+}
+
+def diagnosed_queries():
+    """Every query the app issues, followed by the pushdown candidates"""
+    queries = {f'load_{name}': query for name, query in data_store.LOADER_QUERIES.items()}
+    queries['data_version'] = data_store.VERSION_QUERY
+    queries['fingerprint'] = data_store.FINGERPRINT_QUERY
+    queries.update(PUSHDOWN_QUERIES)
+    return queries
+
+@dataclass(frozen=True)
+class IndexCandidate:
+    table: str
+    columns: tuple
+    reason: str
+    # Queries whose flagged steps on this table the index addresses
+    queries: tuple
+
+    @property
+    def name(self):
+        return f"idx_{self.table}_{'_'.join(self.columns)}"
+
+    def statement(self):
+        return f"CREATE INDEX {self.name} ON {self.table} ({', '.join(self.columns)})"
+
+INDEX_CANDIDATES = [
+    IndexCandidate('document_departments', ('doc_id', 'department_id'), "join from dms_documents in the documents loader",
+                   ('load_documents',)),
+    IndexCandidate('document_departments', ('department_id', 'doc_id'), "department-scoped document lookups",
+                   ('documents_by_department',)),
+    IndexCandidate('dms_documents', ('status', 'created_at'), "status filter with a created_at range and order",
+                   ('documents_by_status_date',)),
+    IndexCandidate('dms_documents', ('updated_at',), "MAX(updated_at) in the change fingerprint",
+                   ('fingerprint',)),
+    IndexCandidate('notifications', ('related_doc_id', 'created_at'), "notifications about a document",
+                   ('notifications_by_document',)),
+    IndexCandidate('notifications', ('created_at',), "date range on the activity timeline",
+                   ('notifications_by_date',)),
+    IndexCandidate('announcements', ('status', 'publish_at'), "published announcements by publish date",
+                   ('announcements_active',)),
+]
+
+# Queries written in MySQL's dialect only; reported as not applicable on other backends
+MYSQL_ONLY_QUERIES = {'fingerprint'}
+
+@dataclass
+class PlanStep:
+    """One access step of a query plan, normalized across MySQL and SQLite"""
+    table: str
+    access: str
+    key: str = None
+    rows: int = None
+    extra: str = ''
+
+    def issues(self):
+        issues = []
+        if self.access == 'ALL':
+            issues.append('full scan')
+        elif self.access == 'index':
+            issues.append('full index scan')
+        if 'filesort' in self.extra:
+            issues.append('filesort')
+        if 'temporary' in self.extra:
+            issues.append('temporary table')
+        # MySQL buffers joins it cannot drive through an index; SQLite builds a throwaway index
+        if 'join buffer' in self.extra or 'automatic' in self.extra:
+            issues.append('join without index')
+        return issues
+
+@dataclass
+class QueryReport:
+    name: str
+    steps: list = field(default_factory=list)
+    flags: list = field(default_factory=list)
+    timings_ms: list = field(default_factory=list)
+    rows: int = None
+    analyze: str = None
+    error: str = None
+    skipped: str = None
+    # Columns each table is looked up, filtered, sorted or aggregated by
+    lookups: dict = field(default_factory=dict)
+
+    @property
+    def median_ms(self):
+        return round(statistics.median(self.timings_ms), 2) if self.timings_ms else None
+
+# Aliases as written in the queries: FROM dms_documents d, JOIN departments dept, ...
+ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'on', 'where', 'left', 'right', 'inner', 'join', 'group', 'order', 'union', 'all', 'limit', 'using'}
+
+def table_aliases(query):
+    """Map aliases and table names used in a query to table names"""
+    aliases = {}
+    for table, alias in ALIAS_PATTERN.findall(query):
+        aliases[table] = table
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+# ON conditions of a join, up to the next clause
+JOIN_PATTERN = re.compile(
+    r'\bJOIN\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?\s+ON\s+(.*?)(?=\b(?:LEFT|RIGHT|INNER|JOIN|WHERE|GROUP|ORDER|UNION)\b|$)',
+    re.IGNORECASE | re.DOTALL
+)
+WHERE_PATTERN = re.compile(r'\bWHERE\s+(.*?)(?=\b(?:GROUP|ORDER|UNION|LIMIT)\b|$)', re.IGNORECASE | re.DOTALL)
+ORDER_PATTERN = re.compile(r'\bORDER\s+BY\s+([\w.,\s]+?)(?=\b(?:LIMIT|UNION)\b|$)', re.IGNORECASE | re.DOTALL)
+AGGREGATE_PATTERN = re.compile(r'\b(?:MIN|MAX)\s*\(\s*((?:\w+\.)?\w+)\s*\)', re.IGNORECASE)
+COMPARED_PATTERN = re.compile(r'((?:\w+\.)?\w+)\s*(?:=|<>|!=|>=|<=|<|>|\bIN\b|\bLIKE\b|\bBETWEEN\b)', re.IGNORECASE)
+
+def lookup_columns(query):
+    """Columns an index on each table could serve: the probed side of join conditions,
+    WHERE comparisons, ORDER BY and MIN/MAX. Unqualified columns belong to the query's
+    first table; UNION parts are read separately."""
+    lookups = {}
+    for part in re.split(r'\bUNION\b(?:\s+ALL\b)?', query, flags=re.IGNORECASE):
+        aliases = table_aliases(part)
+        first = ALIAS_PATTERN.search(part)
+        default = first.group(1) if first else None
+
+        def add(reference, only_alias=None):
+            alias, _, column = reference.rpartition('.')
+            if only_alias is not None and alias != only_alias:
+                return
+            table = aliases.get(alias) if alias else default
+            if table:
+                lookups.setdefault(table, set()).add(column)
+
+        for table, alias, condition in JOIN_PATTERN.findall(part):
+            alias = alias if alias and alias.lower() not in SQL_KEYWORDS else table
+            for reference in re.findall(r'\w+\.\w+', condition):
+                add(reference, only_alias=alias)
+        for clause in WHERE_PATTERN.findall(part):
+            for reference in COMPARED_PATTERN.findall(clause):
+                add(reference)
+        for clause in ORDER_PATTERN.findall(part):
+            for reference in re.findall(r'(?:\w+\.)?\w+', clause):
+                if reference.lower() not in ('asc', 'desc'):
+                    add(reference)
+        for reference in AGGREGATE_PATTERN.findall(part):
+            add(reference)
+    return lookups
+
+def fetch_dicts(cursor):
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+class MySQLBackend:
+    name = 'mysql'
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def explain(self, query):
+        cursor = self.conn.cursor()
+        cursor.execute(f"EXPLAIN {query}")
+        rows = fetch_dicts(cursor)
+        cursor.close()
+        return [
+            PlanStep(
+                table=row.get('table') or '',
+                access=row.get('type') or '',
+                key=row.get('key'),
+                rows=row.get('rows'),
+                extra=(row.get('Extra') or '').lower(),
+            )
+            for row in rows
+        ]
+
+    def supports(self, name):
+        return True
+
+    def explain_analyze(self, query):
+        """Executed plan with actual row counts and timings (MySQL 8.0.18+)"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"EXPLAIN ANALYZE {query}")
+        text = '\n'.join(str(row[0]) for row in cursor.fetchall())
+        cursor.close()
+        return text
+
+    def indexes(self):
+        """Existing indexes as {table: [column tuples]}"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """)
+        indexes = {}
+        for table, index, column in cursor.fetchall():
+            indexes.setdefault((table, index), []).append(column)
+        cursor.close()
+        result = {}
+        for (table, _), columns in indexes.items():
+            result.setdefault(table, []).append(tuple(columns))
+        return result
+
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def explain(self, query):
+        """EXPLAIN QUERY PLAN mapped onto MySQL's access types: SCAN is ALL (or index), SEARCH is ref"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}")
+        steps = []
+        for _, _, _, detail in cursor.fetchall():
+            words = detail.split()
+            key = detail.split(' INDEX ')[1].split()[0] if ' INDEX ' in detail else None
+            if words[0] == 'SCAN' and len(words) > 1 and words[1] not in ('CONSTANT', 'SUBQUERY'):
+                steps.append(PlanStep(words[1], 'index' if key else 'ALL', key=key, extra=detail.lower()))
+            elif words[0] == 'SEARCH':
+                steps.append(PlanStep(words[1], 'ref', key=key, extra=detail.lower()))
+            elif detail.startswith('USE TEMP B-TREE'):
+                kind = 'filesort' if 'ORDER BY' in detail else 'temporary'
+                steps.append(PlanStep('', '', extra=f"{kind} ({detail.lower()})"))
+        cursor.close()
+        return steps
+
+    def explain_analyze(self, query):
+        return None
+
+    def supports(self, name):
+        return name not in MYSQL_ONLY_QUERIES
+
+    def indexes(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        result = {}
+        for (table,) in cursor.fetchall():
+            cursor.execute(f"PRAGMA table_info({table})")
+            primary_key = [row[1] for row in sorted(cursor.fetchall(), key=lambda row: row[5]) if row[5]]
+            result[table] = [tuple(primary_key)] if primary_key else []
+            cursor.execute(f"PRAGMA index_list({table})")
+            for index in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(f"PRAGMA index_info({index})")
+                result[table].append(tuple(row[2] for row in sorted(cursor.fetchall())))
+        cursor.close()
+        return result
+
+def time_query(conn, query, repeat):
+    """Wall time of fetching every row, repeated; returns (timings in ms, row count)"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        cursor.execute(query)
+        rows = len(cursor.fetchall())
+        timings.append((time.perf_counter() - started) * 1000)
+        cursor.close()
+    return timings, rows
+
+def diagnose_query(backend, name, query, repeat=3, analyze=False):
+    report = QueryReport(name)
+    if not backend.supports(name):
+        report.skipped = f"not applicable on {backend.name}"
+        return report
+    try:
+        report.lookups = lookup_columns(query)
+        aliases = table_aliases(query)
+        report.steps = backend.explain(query)
+        for step in report.steps:
+            table = aliases.get(step.table, step.table)
+            report.flags += [(table, issue) for issue in step.issues()]
+        report.timings_ms, report.rows = time_query(backend.conn, query, repeat)
+        if analyze:
+            report.analyze = backend.explain_analyze(query)
+    except Exception as e:
+        report.error = f"{type(e).__name__}: {e}"
+    return report
+
+def covered(columns, existing):
+    """True when an existing index starts with the candidate's columns"""
+    return any(index[:len(columns)] == columns for index in existing)
+
+def advise_indexes(reports, existing):
+    """Missing candidate indexes for tables flagged in the queries they serve, with those queries.
+    A flagged step only counts when the query looks the table up, filters, sorts or aggregates
+    it by the candidate's leading column; the full scan of an unfiltered load needs no index."""
+    flagged = {
+        (report.name, table)
+        for report in reports
+        for table, _ in report.flags
+    }
+    lookups = {report.name: report.lookups for report in reports}
+    suggestions = []
+    for candidate in INDEX_CANDIDATES:
+        if covered(candidate.columns, existing.get(candidate.table, [])):
+            continue
+        queries = [
+            name for name in candidate.queries
+            if (name, candidate.table) in flagged
+            and candidate.columns[0] in lookups.get(name, {}).get(candidate.table, ())
+        ]
+        if queries:
+            suggestions.append((candidate, queries))
+    return suggestions
+
+def run_diagnostics(backend, repeat=3, analyze=False):
+    reports = [
+        diagnose_query(backend, name, query, repeat, analyze)
+        for name, query in diagnosed_queries().items()
+    ]
+    return reports, advise_indexes(reports, backend.indexes())
+
+def apply_indexes(conn, suggestions):
+    cursor = conn.cursor()
+    for candidate, _ in suggestions:
+        cursor.execute(candidate.statement())
+    conn.commit()
+    cursor.close()
+
+def history_entry(backend, reports):
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'backend': backend.name,
+        'queries': {
+            report.name: {
+                'median_ms': report.median_ms,
+                'rows': report.rows,
+                'flags': [f"{table}: {issue}" for table, issue in report.flags],
+                'error': report.error,
+                'skipped': report.skipped,
+            }
+            for report in reports
+        },
+    }
+
+def previous_entry(path, backend_name):
+    """Last recorded run against the same backend, if any"""
+    if not path or not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get('backend') == backend_name:
+                    previous = entry
+    return previous
+
+def append_history(path, entry):
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def print_report(reports, suggestions, previous=None):
+    previous_queries = (previous or {}).get('queries', {})
+    for report in reports:
+        if report.skipped:
+            print(f"{report.name:>28}: {report.skipped}")
+            continue
+        if report.error:
+            print(f"{report.name:>28}: ERROR {report.error}")
+            continue
+        line = f"{report.name:>28}: {report.median_ms} ms median, {report.rows} rows"
+        before = previous_queries.get(report.name, {}).get('median_ms')
+        if before:
+            line += f" (was {before} ms, {report.median_ms / before - 1:+.0%})"
+        print(line)
+        for table, issue in report.flags:
+            print(f"{'':>30}{issue} on {table or '(result)'}")
+        if report.analyze:
+            for plan_line in report.analyze.splitlines():
+                print(f"{'':>30}{plan_line}")
+
+    if suggestions:
+        print("\nSuggested indexes:")
+        for candidate, queries in suggestions:
+            print(f"  {candidate.statement()};")
+            print(f"      -- {candidate.reason}; flagged in {', '.join(queries)}")
+    else:
+        print("\nNo missing indexes for the flagged queries.")
+
+def connect_mysql(args):
+    import mysql.connector
+
+    return mysql.connector.connect(host=args.host, database=args.database, user=args.user, password=args.password)
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the dashboard's queries, flag scans and sorts, and suggest indexes")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--database', default=APP_DATABASE)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--sqlite', help="diagnose this SQLite stand-in instead of MySQL")
+    parser.add_argument('--seed', action='store_true', help="recreate the source tables with synthetic data first")
+    parser.add_argument('--documents', type=int, default=20000, help="synthetic documents when seeding")
+    parser.add_argument('--notifications', type=int, default=60000, help="synthetic notifications when seeding")
+    parser.add_argument('--repeat', type=int, default=3, help="timed executions per query")
+    parser.add_argument('--analyze', action='store_true', help="also print EXPLAIN ANALYZE (MySQL 8.0.18+; executes the query)")
+    parser.add_argument('--apply', action='store_true', help="create the suggested indexes and diagnose again")
+    parser.add_argument('--history', default='query_timings.jsonl', help="append timings to this JSON lines file")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.seed and not args.sqlite and args.database == APP_DATABASE:
+        parser.error("--seed drops the source tables; pass --database with a scratch database")
+
+    if args.sqlite:
+        conn = sqlite3.connect(args.sqlite)
+        backend = SQLiteBackend(conn)
+    else:
+        conn = connect_mysql(args)
+        backend = MySQLBackend(conn)
+
+    try:
+        if args.seed:
+            tables = synthetic.generate_tables(documents=args.documents, notifications=args.notifications)
+            synthetic.seed_database(conn, tables, placeholder='?' if args.sqlite else '%s')
+
+        previous = previous_entry(args.history, backend.name)
+        reports, suggestions = run_diagnostics(backend, args.repeat, args.analyze)
+        print_report(reports, suggestions, previous)
+        entry = history_entry(backend, reports)
+        append_history(args.history, entry)
+
+        if args.apply and suggestions:
+            apply_indexes(conn, suggestions)
+            print("\nCreated the suggested indexes; diagnosing again.\n")
+            previous = entry
+            reports, suggestions = run_diagnostics(backend, args.repeat, args.analyze)
+            print_report(reports, suggestions, previous)
+            entry = history_entry(backend, reports)
+            append_history(args.history, entry)
+    finally:
+        conn.close()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                **entry,
+                'suggestions': [
+                    {'statement': candidate.statement(), 'reason': candidate.reason, 'queries': queries}
+                    for candidate, queries in suggestions
+                ],
+            }, f, indent=2)
+
+if __name__ == '__main__':
+    main()
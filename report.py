@@ -0,0 +1,206 @@
+from datetime import datetime, timedelta
+
+from fpdf import FPDF
+
+from lifecycle import lifecycle_summary
+
+# Anomalous intervals listed in the System Activity part of the report
+MAX_REPORTED_ANOMALIES = 30
+
+# PDF Generation Functions
+class PDFReport(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 15)
+        self.cell(0, 10, 'ISPSC Tagudin DMS Analytics Report', 0, 1, 'C')
+        self.ln(5)
+    
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+    
+    def chapter_title(self, title):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.ln(2)
+    
+    def chapter_body(self, body):
+        self.set_font('Arial', '', 10)
+        self.multi_cell(0, 8, body)
+        self.ln()
+
+def create_pdf_report(documents_df, users_df, announcements_df, notifications_df, subtitle=None, anomalies=None, note=None):
+    pdf = PDFReport()
+    pdf.add_page()
+    
+    # Report header
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'ISPSC Tagudin DMS Analytics Report', 0, 1, 'C')
+    pdf.ln(5)
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 10, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', 0, 1, 'C')
+    if subtitle:
+        pdf.cell(0, 10, subtitle, 0, 1, 'C')
+    if note:
+        pdf.set_font('Arial', 'I', 10)
+        pdf.multi_cell(0, 6, note, 0, 'C')
+    pdf.ln(10)
+    
+    # Key Metrics
+    pdf.chapter_title('Key Metrics')
+    
+    total_docs = len(documents_df) if not documents_df.empty else 0
+    active_users = len(users_df[users_df['status'] == 'active']) if not users_df.empty else 0
+    published_announcements = len(announcements_df[announcements_df['status'] == 'published']) if not announcements_df.empty else 0
+    recent_notifications = len(notifications_df[notifications_df['created_at'] > (datetime.now() - timedelta(days=7))]) if not notifications_df.empty else 0
+    
+    metrics_data = [
+        ['Metric', 'Value'],
+        ['Total Documents', str(total_docs)],
+        ['Active Users', str(active_users)],
+        ['Published Announcements', str(published_announcements)],
+        ['Recent Notifications (7 days)', str(recent_notifications)]
+    ]
+    
+    # Create metrics table
+    col_width = pdf.w / 2.5
+    row_height = pdf.font_size * 2
+    
+    for row in metrics_data:
+        for item in row:
+            pdf.cell(col_width, row_height, item, border=1)
+        pdf.ln(row_height)
+    
+    pdf.ln(10)
+    
+    # Document Analytics
+    pdf.chapter_title('Document Analytics')
+    
+    if not documents_df.empty:
+        # Document status distribution
+        status_counts = documents_df['status'].value_counts()
+        status_text = "Document Status Distribution:\n"
+        for status, count in status_counts.items():
+            status_text += f"- {status}: {count} documents\n"
+        
+        # Document type distribution
+        if 'doc_type' in documents_df.columns:
+            type_counts = documents_df['doc_type'].value_counts()
+            type_text = "\nDocument Types Distribution:\n"
+            for doc_type, count in type_counts.items():
+                type_text += f"- {doc_type}: {count} documents\n"
+        else:
+            type_text = ""
+        
+        pdf.chapter_body(status_text + type_text)
+    else:
+        pdf.chapter_body("No document data available.")
+    
+    pdf.ln(5)
+    
+    # User Analytics
+    pdf.chapter_title('User Analytics')
+    
+    if not users_df.empty:
+        # User status distribution
+        status_counts = users_df['status'].value_counts()
+        status_text = "User Status Distribution:\n"
+        for status, count in status_counts.items():
+            status_text += f"- {status}: {count} users\n"
+        
+        # User role distribution
+        role_counts = users_df['role'].value_counts()
+        role_text = "\nUser Role Distribution:\n"
+        for role, count in role_counts.items():
+            role_text += f"- {role}: {count} users\n"
+        
+        pdf.chapter_body(status_text + role_text)
+    else:
+        pdf.chapter_body("No user data available.")
+    
+    pdf.ln(5)
+    
+    # Announcement Analytics
+    pdf.chapter_title('Announcement Analytics')
+    
+    if not announcements_df.empty:
+        # Announcement status distribution
+        status_counts = announcements_df['status'].value_counts()
+        status_text = "Announcement Status Distribution:\n"
+        for status, count in status_counts.items():
+            status_text += f"- {status}: {count} announcements\n"
+        
+        # Visibility distribution
+        visibility_counts = announcements_df['visible_to_all'].value_counts()
+        visibility_text = "\nAnnouncement Visibility:\n"
+        for visibility, count in visibility_counts.items():
+            vis_name = "Visible to All" if visibility == 1 else "Restricted"
+            visibility_text += f"- {vis_name}: {count} announcements\n"
+        
+        pdf.chapter_body(status_text + visibility_text)
+    else:
+        pdf.chapter_body("No announcement data available.")
+    
+    pdf.ln(5)
+    
+    # Document Lifecycle
+    pdf.chapter_title('Document Lifecycle')
+    
+    lifecycle = lifecycle_summary(documents_df, announcements_df, notifications_df=notifications_df)
+    if lifecycle:
+        lifecycle_text = ""
+        if 'documents_updated' in lifecycle:
+            lifecycle_text += "Documents:\n"
+            lifecycle_text += f"- Updated after creation: {lifecycle['documents_updated']} ({lifecycle['documents_updated_share']:.0%})\n"
+            if lifecycle['median_days_to_update'] is not None:
+                lifecycle_text += f"- Median time to update: {lifecycle['median_days_to_update']:.1f} days\n"
+                lifecycle_text += f"- 90th percentile time to update: {lifecycle['p90_days_to_update']:.1f} days\n"
+            lifecycle_text += f"- Awaiting first update (backlog): {lifecycle['document_backlog']} documents\n"
+            lifecycle_text += f"- Deleted: {lifecycle['documents_deleted']} documents\n"
+        if 'announcements_active' in lifecycle:
+            lifecycle_text += "\nAnnouncement Windows:\n"
+            lifecycle_text += f"- Active now: {lifecycle['announcements_active']} announcements\n"
+            lifecycle_text += f"- Scheduled: {lifecycle['announcements_scheduled']} announcements\n"
+            lifecycle_text += f"- Expired: {lifecycle['announcements_expired']} announcements\n"
+        pdf.chapter_body(lifecycle_text)
+    else:
+        pdf.chapter_body("No lifecycle data available.")
+    
+    pdf.ln(5)
+    
+    # System Activity
+    pdf.chapter_title('System Activity')
+    
+    if not notifications_df.empty:
+        # Notification type distribution
+        type_counts = notifications_df['type'].value_counts()
+        type_text = "Notification Types Distribution:\n"
+        for n_type, count in type_counts.items():
+            type_text += f"- {n_type}: {count} notifications\n"
+        
+        pdf.chapter_body(type_text)
+    else:
+        pdf.chapter_body("No notification data available.")
+    
+    # Activity Anomalies
+    if anomalies is not None:
+        pdf.chapter_title('Activity Anomalies')
+        
+        if not anomalies.empty:
+            recent = anomalies.sort_values('start', ascending=False).head(MAX_REPORTED_ANOMALIES)
+            anomaly_text = f"{len(anomalies)} flagged intervals"
+            if len(anomalies) > len(recent):
+                anomaly_text += f", most recent {len(recent)} listed"
+            anomaly_text += ":\n"
+            for interval in recent.itertuples():
+                anomaly_text += (
+                    f"- {interval.start:%Y-%m-%d %H:%M} to {interval.end:%Y-%m-%d %H:%M}: {interval.stream} {interval.kind} "
+                    f"({interval.granularity}), {interval.count} observed vs {interval.expected:.0f} expected\n"
+                )
+            pdf.chapter_body(anomaly_text)
+        else:
+            pdf.chapter_body("No anomalies detected.")
+    
+    # Save PDF to bytes buffer
+    pdf_bytes = pdf.output(dest='S').encode('latin1')
+    return pdf_bytes
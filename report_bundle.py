@@ -0,0 +1,166 @@
+# Report bundles
+#
+# Renders one PDF report per department and per document type in a process pool
+# and packs them into a single zip. Data is loaded once; every worker receives
+# the frames once through the pool initializer and each task only carries the
+# row positions of its partition. Failed reports are listed in errors.txt
+# inside the bundle instead of aborting the batch.
+#
+#   python report_bundle.py --output reports.zip --workers 4
+import argparse
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+
+from anomalies import activity_anomalies
+from report import create_pdf_report
+from visibility import VisibilityIndex
+
+REPORT_TABLES = ('documents', 'users', 'announcements', 'notifications')
+
+@dataclass
+class ReportPartition:
+    """One report of a bundle: row positions per table, None meaning the whole table"""
+    folder: str
+    name: str
+    subtitle: str
+    rows: dict
+    note: str = None
+
+@dataclass
+class BundleResult:
+    zip_bytes: bytes
+    rendered: list = field(default_factory=list)
+    failures: list = field(default_factory=list)
+
+def positions(mask):
+    return None if mask is None else np.flatnonzero(mask).astype('int32')
+
+NO_ROWS = np.zeros(0, dtype='int32')
+
+def department_partitions(store, visibility):
+    """One partition per department, scoped exactly like the department views"""
+    partitions = []
+    for department in visibility.departments:
+        masks = visibility.masks(department)
+        partitions.append(ReportPartition(
+            folder='departments',
+            name=department,
+            subtitle=f"Department: {department}",
+            rows={table: positions(masks[table]) for table in REPORT_TABLES},
+        ))
+    return partitions
+
+def document_type_partitions(store):
+    """One partition per document type, with the notifications about those documents.
+    Users and announcements are not tied to a document type and are left out."""
+    documents = store.documents
+    notifications = store.notifications
+    if documents.empty or 'doc_type' not in documents.columns:
+        return []
+
+    partitions = []
+    for doc_type in sorted(documents['doc_type'].dropna().unique()):
+        document_mask = (documents['doc_type'] == doc_type).to_numpy()
+        notification_mask = None
+        if not notifications.empty:
+            doc_ids = documents['doc_id'].to_numpy()[document_mask]
+            notification_mask = np.isin(notifications['related_doc_id'].to_numpy(), doc_ids)
+        partitions.append(ReportPartition(
+            folder='document_types',
+            name=str(doc_type),
+            subtitle=f"Document Type: {doc_type}",
+            rows={
+                'documents': positions(document_mask),
+                'users': NO_ROWS,
+                'announcements': NO_ROWS,
+                'notifications': positions(notification_mask),
+            },
+            note="Covers documents of this type and their notifications; users and announcements are not included.",
+        ))
+    return partitions
+
+# Worker side: the frames arrive once per process through the pool initializer
+worker_frames = {}
+
+def init_worker(frames):
+    worker_frames.update(frames)
+
+def render_partition(partition):
+    frames = {
+        table: worker_frames[table] if rows is None else worker_frames[table].iloc[rows]
+        for table, rows in partition.rows.items()
+    }
+    return create_pdf_report(
+        frames['documents'], frames['users'], frames['announcements'], frames['notifications'],
+        subtitle=partition.subtitle, note=partition.note, anomalies=worker_frames['anomalies']
+    )
+
+def safe_filename(name):
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'report'
+
+def build_report_bundle(store, visibility=None, workers=None, by=('departments', 'document_types')):
+    """Render every partition in a process pool and zip the reports"""
+    visibility = visibility or VisibilityIndex(store)
+    partitions = []
+    if 'departments' in by:
+        partitions += department_partitions(store, visibility)
+    if 'document_types' in by:
+        partitions += document_type_partitions(store)
+
+    frames = {table: getattr(store, table) for table in REPORT_TABLES}
+    # Campus-wide anomalies, detected once and listed in every report
+    frames['anomalies'] = activity_anomalies(store)
+    result = BundleResult(zip_bytes=b'')
+    buffer = BytesIO()
+
+    # spawn keeps workers independent of the threads of a running Streamlit server
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle, ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(frames,)
+    ) as executor:
+        futures = {executor.submit(render_partition, partition): partition for partition in partitions}
+        for future in as_completed(futures):
+            partition = futures[future]
+            path = f"{partition.folder}/{safe_filename(partition.name)}.pdf"
+            try:
+                bundle.writestr(path, future.result())
+                result.rendered.append(path)
+            except Exception as e:
+                result.failures.append((path, f"{type(e).__name__}: {e}"))
+
+        if result.failures:
+            bundle.writestr('errors.txt', ''.join(f"{path}: {error}\n" for path, error in sorted(result.failures)))
+
+    result.rendered.sort()
+    result.zip_bytes = buffer.getvalue()
+    return result
+
+def main():
+    from data_store import get_data_store
+
+    parser = argparse.ArgumentParser(description="Render per-department and per-type PDF reports into one zip")
+    parser.add_argument('--output', default=f"ispsc_dms_reports_{datetime.now().strftime('%Y%m%d')}.zip")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--by', nargs='+', choices=['departments', 'document_types'], default=['departments', 'document_types'])
+    args = parser.parse_args()
+
+    result = build_report_bundle(get_data_store(), workers=args.workers, by=args.by)
+    with open(args.output, 'wb') as f:
+        f.write(result.zip_bytes)
+
+    print(f"Wrote {len(result.rendered)} reports to {args.output}")
+    for path, error in result.failures:
+        print(f"FAILED {path}: {error}")
+
+if __name__ == '__main__':
+    main()
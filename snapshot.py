@@ -0,0 +1,98 @@
+# Dashboard snapshots
+#
+# A snapshot is one zip holding a zstd-compressed Parquet file per dashboard
+# table and a manifest.json with the schema, row counts and data versions the
+# tables were loaded at. Parquet members are stored uncompressed in the zip so
+# loading is a columnar read per table with no re-parsing of dates.
+#
+#   python snapshot.py export snapshot.zip      # from the configured MySQL database
+#   python snapshot.py info snapshot.zip
+#   DMS_SNAPSHOT=snapshot.zip streamlit run ispsc.py
+#
+# DMS_SNAPSHOT replays a snapshot without touching the database;
+# DMS_FALLBACK_SNAPSHOT serves one only while the database is unreachable.
+import argparse
+import json
+import time
+import zipfile
+from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+def write_snapshot(path, frames, versions, data_version, created_at, source=None):
+    """Write frames {table: DataFrame} and their versions to a snapshot file"""
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'source': source,
+        'data_version': data_version,
+        'tables': {},
+    }
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+        for table, df in frames.items():
+            buffer = BytesIO()
+            df.to_parquet(buffer, engine='pyarrow', compression='zstd', index=False)
+            archive.writestr(f'{table}.parquet', buffer.getvalue())
+            manifest['tables'][table] = {
+                'rows': len(df),
+                'columns': {column: str(dtype) for column, dtype in df.dtypes.items()},
+                'version': versions.get(table),
+            }
+        archive.writestr(MANIFEST, json.dumps(manifest, indent=2))
+    return manifest
+
+def read_manifest(path):
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST))
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported snapshot format {manifest.get('format_version')}")
+    return manifest
+
+def read_snapshot(path):
+    """Frames and manifest of a snapshot file; fails when a table does not match its recorded schema"""
+    manifest = read_manifest(path)
+    frames = {}
+    with zipfile.ZipFile(path) as archive:
+        for table, info in manifest['tables'].items():
+            df = pd.read_parquet(BytesIO(archive.read(f'{table}.parquet')), engine='pyarrow')
+            if len(df) != info['rows'] or list(df.columns) != list(info['columns']):
+                raise ValueError(f"{path}: table {table} does not match the manifest")
+            frames[table] = df
+    return frames, manifest
+
+def print_manifest(manifest):
+    print(f"Created: {manifest['created_at']}" + (f" from {manifest['source']}" if manifest.get('source') else ''))
+    print(f"Data version: {manifest['data_version']}")
+    for table, info in manifest['tables'].items():
+        print(f"{table:>22}: {info['rows']} rows, {len(info['columns'])} columns, version {info['version']}")
+
+def main():
+    import data_store
+
+    parser = argparse.ArgumentParser(description="Export, inspect and time dashboard snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help="snapshot the configured database")
+    export.add_argument('path', nargs='?', default=f"ispsc_dms_snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+    info = subparsers.add_parser('info', help="print a snapshot's manifest")
+    info.add_argument('path')
+    load = subparsers.add_parser('load', help="time loading a snapshot")
+    load.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        manifest = data_store.export_snapshot(data_store.get_data_store(), args.path)
+        print(f"Wrote {args.path}")
+        print_manifest(manifest)
+    elif args.command == 'info':
+        print_manifest(read_manifest(args.path))
+    else:
+        started = time.perf_counter()
+        store = data_store.load_snapshot_store(args.path)
+        print(f"Loaded {args.path} in {(time.perf_counter() - started) * 1000:.1f} ms, {store.memory_usage() / 2**20:.1f} MiB in memory")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+-- Change log for the analytics dashboard.
+-- Every write to a source table bumps its counter in dms_data_version; the
+-- dashboard polls this table and reloads only the tables whose version moved.
+--
+--   mysql -u root ispsc_tagudin_dms_db < sql/change_log.sql
+
+CREATE TABLE IF NOT EXISTS dms_data_version (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO dms_data_version (table_name, version) VALUES
+    ('dms_documents', 0),
+    ('document_types', 0),
+    ('document_departments', 0),
+    ('departments', 0),
+    ('dms_user', 0),
+    ('announcements', 0),
+    ('notifications', 0);
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS dms_documents_insert_version$$
+CREATE TRIGGER dms_documents_insert_version AFTER INSERT ON dms_documents
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_documents'$$
+
+DROP TRIGGER IF EXISTS dms_documents_update_version$$
+CREATE TRIGGER dms_documents_update_version AFTER UPDATE ON dms_documents
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_documents'$$
+
+DROP TRIGGER IF EXISTS dms_documents_delete_version$$
+CREATE TRIGGER dms_documents_delete_version AFTER DELETE ON dms_documents
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_documents'$$
+
+DROP TRIGGER IF EXISTS document_types_insert_version$$
+CREATE TRIGGER document_types_insert_version AFTER INSERT ON document_types
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_types'$$
+
+DROP TRIGGER IF EXISTS document_types_update_version$$
+CREATE TRIGGER document_types_update_version AFTER UPDATE ON document_types
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_types'$$
+
+DROP TRIGGER IF EXISTS document_types_delete_version$$
+CREATE TRIGGER document_types_delete_version AFTER DELETE ON document_types
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_types'$$
+
+DROP TRIGGER IF EXISTS document_departments_insert_version$$
+CREATE TRIGGER document_departments_insert_version AFTER INSERT ON document_departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_departments'$$
+
+DROP TRIGGER IF EXISTS document_departments_update_version$$
+CREATE TRIGGER document_departments_update_version AFTER UPDATE ON document_departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_departments'$$
+
+DROP TRIGGER IF EXISTS document_departments_delete_version$$
+CREATE TRIGGER document_departments_delete_version AFTER DELETE ON document_departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'document_departments'$$
+
+DROP TRIGGER IF EXISTS departments_insert_version$$
+CREATE TRIGGER departments_insert_version AFTER INSERT ON departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'departments'$$
+
+DROP TRIGGER IF EXISTS departments_update_version$$
+CREATE TRIGGER departments_update_version AFTER UPDATE ON departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'departments'$$
+
+DROP TRIGGER IF EXISTS departments_delete_version$$
+CREATE TRIGGER departments_delete_version AFTER DELETE ON departments
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'departments'$$
+
+DROP TRIGGER IF EXISTS dms_user_insert_version$$
+CREATE TRIGGER dms_user_insert_version AFTER INSERT ON dms_user
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_user'$$
+
+DROP TRIGGER IF EXISTS dms_user_update_version$$
+CREATE TRIGGER dms_user_update_version AFTER UPDATE ON dms_user
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_user'$$
+
+DROP TRIGGER IF EXISTS dms_user_delete_version$$
+CREATE TRIGGER dms_user_delete_version AFTER DELETE ON dms_user
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'dms_user'$$
+
+DROP TRIGGER IF EXISTS announcements_insert_version$$
+CREATE TRIGGER announcements_insert_version AFTER INSERT ON announcements
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'announcements'$$
+
+DROP TRIGGER IF EXISTS announcements_update_version$$
+CREATE TRIGGER announcements_update_version AFTER UPDATE ON announcements
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'announcements'$$
+
+DROP TRIGGER IF EXISTS announcements_delete_version$$
+CREATE TRIGGER announcements_delete_version AFTER DELETE ON announcements
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'announcements'$$
+
+DROP TRIGGER IF EXISTS notifications_insert_version$$
+CREATE TRIGGER notifications_insert_version AFTER INSERT ON notifications
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'notifications'$$
+
+DROP TRIGGER IF EXISTS notifications_update_version$$
+CREATE TRIGGER notifications_update_version AFTER UPDATE ON notifications
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'notifications'$$
+
+DROP TRIGGER IF EXISTS notifications_delete_version$$
+CREATE TRIGGER notifications_delete_version AFTER DELETE ON notifications
+FOR EACH ROW
+    UPDATE dms_data_version SET version = version + 1 WHERE table_name = 'notifications'$$
+
+DELIMITER ;
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic DMS data
+# Generates the source tables the dashboard reads, with the columns the loaders
+# select, for load tests, query diagnostics and demos without the real database.
+DEPARTMENTS = [
+    'College of Arts and Sciences',
+    'College of Teacher Education',
+    'College of Business Management',
+    'College of Computing Studies',
+    'College of Criminal Justice Education',
+    'Graduate School',
+    'Registrar',
+    'Accounting Office',
+]
+
+DOCUMENT_TYPES = ['Memorandum', 'Special Order', 'Office Order', 'Letter', 'Report', 'Travel Order', 'Certificate']
+
+DOCUMENT_STATUSES = ['active', 'inactive']
+USER_ROLES = ['ADMIN', 'DEAN', 'FACULTY']
+USER_STATUSES = ['active', 'pending', 'deleted']
+ANNOUNCEMENT_STATUSES = ['published', 'draft', 'archived']
+NOTIFICATION_TYPES = ['added', 'updated', 'requested', 'announcement', 'approved']
+
+# Portable DDL (MySQL and SQLite) for the columns the dashboard uses
+SCHEMA = {
+    'departments': """
+        CREATE TABLE departments (
+            department_id INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL
+        )""",
+    'document_types': """
+        CREATE TABLE document_types (
+            type_id INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL
+        )""",
+    'dms_documents': """
+        CREATE TABLE dms_documents (
+            doc_id INTEGER PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            reference VARCHAR(255),
+            status VARCHAR(32) NOT NULL,
+            visible_to_all INTEGER NOT NULL DEFAULT 0,
+            doc_type INTEGER,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME,
+            created_by_name VARCHAR(255),
+            deleted INTEGER NOT NULL DEFAULT 0
+        )""",
+    'document_departments': """
+        CREATE TABLE document_departments (
+            doc_id INTEGER NOT NULL,
+            department_id INTEGER NOT NULL
+        )""",
+    'dms_user': """
+        CREATE TABLE dms_user (
+            user_id INTEGER PRIMARY KEY,
+            Username VARCHAR(255) NOT NULL,
+            firstname VARCHAR(255),
+            lastname VARCHAR(255),
+            user_email VARCHAR(255),
+            role VARCHAR(32),
+            status VARCHAR(32),
+            department_id INTEGER,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME
+        )""",
+    'announcements': """
+        CREATE TABLE announcements (
+            announcement_id INTEGER PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            status VARCHAR(32) NOT NULL,
+            visible_to_all INTEGER NOT NULL DEFAULT 0,
+            publish_at DATETIME,
+            expire_at DATETIME,
+            created_by_name VARCHAR(255),
+            created_at DATETIME NOT NULL
+        )""",
+    'notifications': """
+        CREATE TABLE notifications (
+            notification_id INTEGER PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            type VARCHAR(32),
+            created_at DATETIME NOT NULL,
+            related_doc_id INTEGER
+        )""",
+    'dms_data_version': """
+        CREATE TABLE dms_data_version (
+            table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )""",
+}
+
+def random_timestamps(rng, count, start, end):
+    """Timestamps between start and end, busier on weekdays, office hours and enrollment months"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    days = pd.date_range(start.normalize(), end.normalize(), freq='D')
+    weights = np.where(days.dayofweek < 5, 1.0, 0.15)
+    weights = weights * np.where(days.month.isin([1, 6, 8]), 2.5, 1.0)
+    picked_days = rng.choice(len(days), size=count, p=weights / weights.sum())
+    hours = np.clip(rng.normal(11, 2.5, count), 0, 23.99)
+    offsets = pd.to_timedelta(hours * 3600, unit='s')
+    return pd.DatetimeIndex(days[picked_days] + offsets).floor('s')
+
+def generate_tables(documents=20000, users=500, announcements=800, notifications=60000, years=3, seed=0):
+    """Source tables keyed by table name, sized like a campus DMS after a few years"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().floor('D')
+    start = end - pd.DateOffset(years=years)
+
+    departments = pd.DataFrame({
+        'department_id': np.arange(1, len(DEPARTMENTS) + 1),
+        'name': DEPARTMENTS,
+    })
+    document_types = pd.DataFrame({
+        'type_id': np.arange(1, len(DOCUMENT_TYPES) + 1),
+        'name': DOCUMENT_TYPES,
+    })
+
+    user_created = random_timestamps(rng, users, start, end).sort_values()
+    firstnames = rng.choice(['Maria', 'Jose', 'Ana', 'Juan', 'Liza', 'Mark', 'Grace', 'Paolo', 'Rhea', 'Noel'], users)
+    lastnames = rng.choice(['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Ramos', 'Aquino', 'Castro', 'Flores'], users)
+    dms_user = pd.DataFrame({
+        'user_id': np.arange(1, users + 1),
+        'Username': [f'user{i}' for i in range(1, users + 1)],
+        'firstname': firstnames,
+        'lastname': lastnames,
+        'user_email': [f'user{i}@ispsc.edu.ph' for i in range(1, users + 1)],
+        'role': rng.choice(USER_ROLES, users, p=[0.05, 0.1, 0.85]),
+        'status': rng.choice(USER_STATUSES, users, p=[0.85, 0.1, 0.05]),
+        'department_id': rng.integers(1, len(DEPARTMENTS) + 1, users),
+        'created_at': user_created,
+        'updated_at': user_created + pd.to_timedelta(rng.integers(0, 30 * 86400, users), unit='s'),
+    })
+    user_names = (dms_user['firstname'] + ' ' + dms_user['lastname']).to_numpy()
+
+    # A few prolific creators produce most documents
+    creator_weights = rng.pareto(1.5, users) + 1
+    creator_weights = creator_weights / creator_weights.sum()
+
+    doc_created = random_timestamps(rng, documents, start, end).sort_values()
+    updated_after = rng.exponential(5 * 86400, documents) * (rng.random(documents) < 0.7)
+    dms_documents = pd.DataFrame({
+        'doc_id': np.arange(1, documents + 1),
+        'title': [f'Document {i}' for i in range(1, documents + 1)],
+        'reference': [f'ISPSC-{2000 + i // 1000}-{i:06d}' for i in range(1, documents + 1)],
+        'status': rng.choice(DOCUMENT_STATUSES, documents, p=[0.9, 0.1]),
+        'visible_to_all': (rng.random(documents) < 0.3).astype(int),
+        'doc_type': rng.integers(1, len(DOCUMENT_TYPES) + 1, documents),
+        'created_at': doc_created,
+        'updated_at': doc_created + pd.to_timedelta(updated_after, unit='s'),
+        'created_by_name': rng.choice(user_names, documents, p=creator_weights),
+        'deleted': (rng.random(documents) < 0.03).astype(int),
+    })
+
+    # One to three departments per document
+    per_doc = rng.integers(1, 4, documents)
+    document_departments = pd.DataFrame({
+        'doc_id': np.repeat(dms_documents['doc_id'].to_numpy(), per_doc),
+        'department_id': rng.integers(1, len(DEPARTMENTS) + 1, int(per_doc.sum())),
+    }).drop_duplicates(ignore_index=True)
+
+    publish_at = random_timestamps(rng, announcements, start, end).sort_values()
+    announcement_rows = pd.DataFrame({
+        'announcement_id': np.arange(1, announcements + 1),
+        'title': [f'Announcement {i}' for i in range(1, announcements + 1)],
+        'status': rng.choice(ANNOUNCEMENT_STATUSES, announcements, p=[0.75, 0.15, 0.1]),
+        'visible_to_all': (rng.random(announcements) < 0.6).astype(int),
+        'publish_at': publish_at,
+        'expire_at': publish_at + pd.to_timedelta(rng.integers(3, 60, announcements), unit='D'),
+        'created_by_name': rng.choice(user_names, announcements, p=creator_weights),
+        'created_at': publish_at - pd.to_timedelta(rng.integers(0, 7 * 86400, announcements), unit='s'),
+    })
+
+    notification_rows = pd.DataFrame({
+        'notification_id': np.arange(1, notifications + 1),
+        'title': [f'Notification {i}' for i in range(1, notifications + 1)],
+        'type': rng.choice(NOTIFICATION_TYPES, notifications, p=[0.4, 0.25, 0.15, 0.1, 0.1]),
+        'created_at': random_timestamps(rng, notifications, start, end).sort_values(),
+        'related_doc_id': rng.integers(1, documents + 1, notifications),
+    })
+
+    return {
+        'departments': departments,
+        'document_types': document_types,
+        'dms_user': dms_user,
+        'dms_documents': dms_documents,
+        'document_departments': document_departments,
+        'announcements': announcement_rows,
+        'notifications': notification_rows,
+        'dms_data_version': pd.DataFrame({'table_name': list(SCHEMA)[:-1], 'version': 1}),
+    }
+
+def seed_database(conn, tables, placeholder='%s', batch_size=5000, create=True):
+    """Create the schema and bulk insert the generated tables through a DB-API connection"""
+    cursor = conn.cursor()
+    for name, df in tables.items():
+        if create:
+            cursor.execute(f"DROP TABLE IF EXISTS {name}")
+            cursor.execute(SCHEMA[name])
+        columns = ', '.join(df.columns)
+        values = ', '.join([placeholder] * len(df.columns))
+        statement = f"INSERT INTO {name} ({columns}) VALUES ({values})"
+        rows = df.astype(object).where(df.notna(), None)
+        for column in rows.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                rows[column] = df[column].dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(df[column].notna(), None)
+        rows = rows.to_numpy().tolist()
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(statement, rows[start:start + batch_size])
+    conn.commit()
+    cursor.close()
+
+def create_sqlite_standin(path, **sizes):
+    """Write the synthetic tables to an SQLite file standing in for MySQL"""
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    try:
+        seed_database(conn, generate_tables(**sizes), placeholder='?')
+    finally:
+        conn.close()
+    return path
@@ -0,0 +1,109 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Department-scoped views
+# For every department the rows it may see are precomputed once per data version
+# as boolean masks aligned with the shared frames. A session's view is the AND of
+# its department mask with its filter mask; nothing is re-filtered per user.
+
+# Roles that always see every department
+ADMIN_ROLES = {'admin', 'administrator'}
+
+def is_visible_to_all(df):
+    return df['visible_to_all'].fillna(0).astype(int).to_numpy() == 1
+
+class VisibilityIndex:
+    """Per-department row masks over the shared documents, notifications, announcements and users"""
+    def __init__(self, store):
+        documents = store.documents
+        mapping = store.document_departments
+        self.store = store
+        self.lock = threading.RLock()
+        self.cache = {}
+
+        mapped_departments = set(mapping['department'].dropna()) if not mapping.empty else set()
+        user_departments = set(store.users['department'].dropna()) if not store.users.empty else set()
+        self.departments = sorted(mapped_departments | user_departments)
+
+        if documents.empty:
+            self.public_documents = np.zeros(0, dtype=bool)
+            self.document_masks = {}
+            return
+
+        self.public_documents = is_visible_to_all(documents)
+        positions = pd.Index(documents['doc_id']).get_indexer(mapping['doc_id']) if not mapping.empty else np.zeros(0, dtype='int64')
+        departments = mapping['department'].to_numpy() if not mapping.empty else np.zeros(0, dtype=object)
+        known = positions >= 0
+        positions, departments = positions[known], departments[known]
+
+        # One pass per department over the mapping rows only, not over the documents
+        self.document_masks = {}
+        for department in self.departments:
+            mask = self.public_documents.copy()
+            mask[positions[departments == department]] = True
+            self.document_masks[department] = mask
+
+    def documents(self, department):
+        if department is None:
+            return None
+        return self.document_masks.get(department, self.public_documents)
+
+    def notifications(self, department):
+        """Notifications about documents the department can see, plus ones not tied to a document"""
+        if department is None or self.store.notifications.empty:
+            return None
+        return self.memoized(('notifications', department), lambda: self.notification_mask(department))
+
+    def notification_mask(self, department):
+        notifications = self.store.notifications
+        # Row position of each notification's document, shared by all departments
+        positions = self.memoized(
+            ('notification_positions',),
+            lambda: pd.Index(self.store.documents['doc_id']).get_indexer(notifications['related_doc_id'])
+        )
+        document_mask = self.documents(department)
+        mask = notifications['related_doc_id'].isna().to_numpy(copy=True)
+        tied = positions >= 0
+        mask[tied] = document_mask[positions[tied]]
+        return mask
+
+    def announcements(self, department):
+        """Department views only list announcements published to everyone"""
+        if department is None or self.store.announcements.empty:
+            return None
+        return self.memoized(('announcements', None), lambda: is_visible_to_all(self.store.announcements))
+
+    def users(self, department):
+        if department is None or self.store.users.empty:
+            return None
+        return self.memoized(('users', department), lambda: (self.store.users['department'] == department).to_numpy())
+
+    def memoized(self, key, build):
+        with self.lock:
+            if key not in self.cache:
+                self.cache[key] = build()
+            return self.cache[key]
+
+    def masks(self, department):
+        """Visibility masks for every table, None meaning unrestricted"""
+        return {
+            'documents': self.documents(department),
+            'notifications': self.notifications(department),
+            'announcements': self.announcements(department),
+            'users': self.users(department),
+        }
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_visibility_index(version, _store):
+    """VisibilityIndex for one data version, shared by every session"""
+    return VisibilityIndex(_store)
+
+def department_scope(role, department):
+    """Department a user is restricted to, or None for an unrestricted view.
+    Non-admin users without a department only see documents visible to all."""
+    if role and str(role).lower() in ADMIN_ROLES:
+        return None
+    return department or ''